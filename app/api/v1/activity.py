@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.db.database import get_db
 from app.db.models.activity import ManagementSystem, Laboratory
@@ -8,16 +9,18 @@ from app.schemas.activity import (
     Laboratory as LaboratorySchema, LaboratoryCreate, LaboratoryUpdate
 )
 from app.api.v1.auth import get_moderator_user
-from app.services.utils import save_uploaded_file
-import os
+from app.services.utils import save_uploaded_file, delete_file_async
+from app.core.cache import cache
+from app.core.config import settings
 
 router = APIRouter()
 
 # Management System endpoints
 @router.get("/management-system", response_model=ManagementSystemSchema)
-async def get_management_system(db: Session = Depends(get_db)):
+@cache.cached("activity", ttl=settings.cache_long_ttl, response_model=ManagementSystemSchema)
+async def get_management_system(db: AsyncSession = Depends(get_db)):
     """Get management system certification information"""
-    system = db.query(ManagementSystem).filter(ManagementSystem.is_active == True).first()
+    system = await db.scalar(select(ManagementSystem).where(ManagementSystem.is_active == True).limit(1))
     if not system:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -29,24 +32,26 @@ async def get_management_system(db: Session = Depends(get_db)):
 async def create_management_system(
     system_data: ManagementSystemCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create or update management system information (moderator/admin only)"""
-    existing_system = db.query(ManagementSystem).filter(ManagementSystem.is_active == True).first()
+    existing_system = await db.scalar(select(ManagementSystem).where(ManagementSystem.is_active == True).limit(1))
     if existing_system:
         # Update existing
-        update_data = system_data.dict()
+        update_data = system_data.model_dump()
         for field, value in update_data.items():
             setattr(existing_system, field, value)
-        db.commit()
-        db.refresh(existing_system)
+        await db.commit()
+        await db.refresh(existing_system)
+        await cache.invalidate("activity")
         return existing_system
     else:
         # Create new
-        db_system = ManagementSystem(**system_data.dict())
+        db_system = ManagementSystem(**system_data.model_dump())
         db.add(db_system)
-        db.commit()
-        db.refresh(db_system)
+        await db.commit()
+        await db.refresh(db_system)
+        await cache.invalidate("activity")
         return db_system
 
 @router.put("/management-system/{system_id}", response_model=ManagementSystemSchema)
@@ -54,32 +59,33 @@ async def update_management_system(
     system_id: int,
     system_update: ManagementSystemUpdate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update management system (moderator/admin only)"""
-    system = db.query(ManagementSystem).filter(ManagementSystem.id == system_id).first()
+    system = await db.get(ManagementSystem, system_id)
     if not system:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Management system not found"
         )
     
-    update_data = system_update.dict(exclude_unset=True)
+    update_data = system_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(system, field, value)
     
-    db.commit()
-    db.refresh(system)
+    await db.commit()
+    await db.refresh(system)
+    await cache.invalidate("activity")
     return system
 
 @router.post("/management-system/upload-pdf")
 async def upload_management_system_pdf(
     file: UploadFile = File(...),
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload PDF for management system"""
-    system = db.query(ManagementSystem).filter(ManagementSystem.is_active == True).first()
+    system = await db.scalar(select(ManagementSystem).where(ManagementSystem.is_active == True).limit(1))
     if not system:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,19 +96,21 @@ async def upload_management_system_pdf(
     file_path = await save_uploaded_file(file, "management_system", ["document"])
     
     # Remove old PDF if exists
-    if system.pdf_path and os.path.exists(system.pdf_path):
-        os.remove(system.pdf_path)
+    if system.pdf_path:
+        await delete_file_async(system.pdf_path)
     
     system.pdf_path = file_path
-    db.commit()
+    await db.commit()
+    await cache.invalidate("activity")
     
     return {"message": "PDF uploaded successfully", "file_path": file_path}
 
 # Laboratory endpoints
 @router.get("/laboratory", response_model=LaboratorySchema)
-async def get_laboratory(db: Session = Depends(get_db)):
+@cache.cached("activity", ttl=settings.cache_long_ttl, response_model=LaboratorySchema)
+async def get_laboratory(db: AsyncSession = Depends(get_db)):
     """Get laboratory information"""
-    lab = db.query(Laboratory).filter(Laboratory.is_active == True).first()
+    lab = await db.scalar(select(Laboratory).where(Laboratory.is_active == True).limit(1))
     if not lab:
         # Return default laboratory info if not found
         return {
@@ -120,25 +128,27 @@ async def get_laboratory(db: Session = Depends(get_db)):
 async def create_laboratory(
     lab_data: LaboratoryCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create or update laboratory information (moderator/admin only)"""
-    existing_lab = db.query(Laboratory).filter(Laboratory.is_active == True).first()
+    existing_lab = await db.scalar(select(Laboratory).where(Laboratory.is_active == True).limit(1))
     if existing_lab:
         # Update existing
-        update_data = lab_data.dict()
+        update_data = lab_data.model_dump()
         for field, value in update_data.items():
             if value is not None:  # Only update non-None values
                 setattr(existing_lab, field, value)
-        db.commit()
-        db.refresh(existing_lab)
+        await db.commit()
+        await db.refresh(existing_lab)
+        await cache.invalidate("activity")
         return existing_lab
     else:
         # Create new
-        db_lab = Laboratory(**lab_data.dict())
+        db_lab = Laboratory(**lab_data.model_dump())
         db.add(db_lab)
-        db.commit()
-        db.refresh(db_lab)
+        await db.commit()
+        await db.refresh(db_lab)
+        await cache.invalidate("activity")
         return db_lab
 
 @router.put("/laboratory/{lab_id}", response_model=LaboratorySchema)
@@ -146,20 +156,21 @@ async def update_laboratory(
     lab_id: int,
     lab_update: LaboratoryUpdate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update laboratory (moderator/admin only)"""
-    lab = db.query(Laboratory).filter(Laboratory.id == lab_id).first()
+    lab = await db.get(Laboratory, lab_id)
     if not lab:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Laboratory not found"
         )
     
-    update_data = lab_update.dict(exclude_unset=True)
+    update_data = lab_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(lab, field, value)
     
-    db.commit()
-    db.refresh(lab)
+    await db.commit()
+    await db.refresh(lab)
+    await cache.invalidate("activity")
     return lab
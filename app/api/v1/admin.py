@@ -1,9 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, select, update, union_all, literal, literal_column, null, text, bindparam
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from app.db.database import get_db
+import asyncio
+import csv
+import io
+import json
+from app.db.database import get_db, AsyncSessionLocal
 from app.db.models.user import User
 from app.db.models.news import News, Announcement
 from app.db.models.regulations import Law, UrbanNorm, Standard, BuildingRegulation, SmetaResourceNorm, Reference
@@ -12,123 +17,79 @@ from app.db.models.activity import ManagementSystem, Laboratory
 from app.db.models.contact import Contact, AntiCorruption
 from app.api.v1.auth import get_admin_user, get_moderator_user
 from app.core.config import settings
+from app.core.cache import cache
+from app.services.utils import generate_search_filters
+from app.services.dashboard import load_dashboard_stats, refresh_dashboard_counters
 
 router = APIRouter()
 
+EXPORT_BATCH_SIZE = 5000
+
+# AsyncSession is not safe for concurrent use, so queries that are gathered
+# run in short-lived sessions of their own
+async def _fetch_one(statement):
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(statement)).one()
+
+async def _fetch_all(statement):
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(statement)).all()
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
 @router.get("/dashboard")
+@cache.cached("admin")
 async def get_dashboard_stats(
-    current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_admin_user)
 ):
     """Get dashboard statistics for admin panel"""
-    
-    # User statistics
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    admin_users = db.query(User).filter(User.is_admin == True).count()
-    moderator_users = db.query(User).filter(User.is_moderator == True).count()
-    
-    # Content statistics
-    total_news = db.query(News).count()
-    active_news = db.query(News).filter(News.is_active == True).count()
-    featured_news = db.query(News).filter(and_(News.is_active == True, News.is_featured == True)).count()
-    
-    total_announcements = db.query(Announcement).count()
-    active_announcements = db.query(Announcement).filter(Announcement.is_active == True).count()
-    
-    # Regulations statistics
-    total_laws = db.query(Law).count()
-    total_standards = db.query(Standard).count()
-    total_urban_norms = db.query(UrbanNorm).count()
-    total_building_regulations = db.query(BuildingRegulation).count()
-    
-    # Contact statistics
-    total_contacts = db.query(Contact).count()
-    unread_contacts = db.query(Contact).filter(Contact.is_read == False).count()
-    replied_contacts = db.query(Contact).filter(Contact.is_replied == True).count()
-    
-    # Recent activity (last 7 days)
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    recent_news = db.query(News).filter(News.created_at >= week_ago).count()
-    recent_contacts = db.query(Contact).filter(Contact.created_at >= week_ago).count()
-    recent_users = db.query(User).filter(User.created_at >= week_ago).count()
-    
-    # Institute statistics
-    total_management = db.query(Management).filter(Management.is_active == True).count()
-    total_divisions = db.query(StructuralDivision).filter(StructuralDivision.is_active == True).count()
-    total_vacancies = db.query(Vacancy).filter(Vacancy.is_active == True).count()
-    
-    return {
-        "users": {
-            "total": total_users,
-            "active": active_users,
-            "admins": admin_users,
-            "moderators": moderator_users,
-            "recent": recent_users
-        },
-        "content": {
-            "news": {
-                "total": total_news,
-                "active": active_news,
-                "featured": featured_news,
-                "recent": recent_news
-            },
-            "announcements": {
-                "total": total_announcements,
-                "active": active_announcements
-            }
-        },
-        "regulations": {
-            "laws": total_laws,
-            "standards": total_standards,
-            "urban_norms": total_urban_norms,
-            "building_regulations": total_building_regulations
-        },
-        "contacts": {
-            "total": total_contacts,
-            "unread": unread_contacts,
-            "replied": replied_contacts,
-            "recent": recent_contacts
-        },
-        "institute": {
-            "management": total_management,
-            "divisions": total_divisions,
-            "vacancies": total_vacancies
-        }
-    }
+    # Counters are precomputed by the background refresher (see lifespan in main.py)
+    return await load_dashboard_stats()
 
 @router.get("/users/analytics")
+@cache.cached("admin")
 async def get_user_analytics(
-    current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_admin_user)
 ):
     """Get user analytics for admin panel"""
     
     # User registration trends (last 30 days)
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
     
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    
     # Daily registration counts
-    daily_registrations = db.query(
+    daily_registrations_query = select(
         func.date(User.created_at).label('date'),
         func.count(User.id).label('count')
-    ).filter(
+    ).where(
         User.created_at >= thirty_days_ago
     ).group_by(
         func.date(User.created_at)
-    ).order_by('date').all()
+    ).order_by('date')
+    
+    # User role distribution and activity (users who logged in last 7 days)
+    counts_query = select(
+        func.count().filter(and_(User.is_admin == False, User.is_moderator == False)).label("regular_users"),
+        func.count().filter(User.is_moderator == True).label("moderators"),
+        func.count().filter(User.is_admin == True).label("admins"),
+        func.count().filter(User.last_login >= week_ago).label("active_last_week")
+    ).select_from(User)
+    
+    daily_registrations, counts = await asyncio.gather(
+        _fetch_all(daily_registrations_query),
+        _fetch_one(counts_query)
+    )
     
-    # User role distribution
     role_distribution = {
-        "regular_users": db.query(User).filter(
-            and_(User.is_admin == False, User.is_moderator == False)
-        ).count(),
-        "moderators": db.query(User).filter(User.is_moderator == True).count(),
-        "admins": db.query(User).filter(User.is_admin == True).count()
+        "regular_users": counts.regular_users,
+        "moderators": counts.moderators,
+        "admins": counts.admins
     }
-    
-    # User activity (users who logged in last 7 days)
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    active_users_week = db.query(User).filter(User.last_login >= week_ago).count()
+    active_users_week = counts.active_last_week
     
     return {
         "daily_registrations": [
@@ -140,9 +101,9 @@ async def get_user_analytics(
     }
 
 @router.get("/content/analytics")
+@cache.cached("admin")
 async def get_content_analytics(
-    current_user: User = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_moderator_user)
 ):
     """Get content analytics for admin/moderator panel"""
     
@@ -150,27 +111,40 @@ async def get_content_analytics(
     thirty_days_ago = datetime.utcnow() - timedelta(days=30)
     
     # Daily content creation
-    daily_news = db.query(
+    daily_news_query = select(
         func.date(News.created_at).label('date'),
         func.count(News.id).label('count')
-    ).filter(
+    ).where(
         News.created_at >= thirty_days_ago
     ).group_by(
         func.date(News.created_at)
-    ).order_by('date').all()
+    ).order_by('date')
     
-    daily_announcements = db.query(
+    daily_announcements_query = select(
         func.date(Announcement.created_at).label('date'),
         func.count(Announcement.id).label('count')
-    ).filter(
+    ).where(
         Announcement.created_at >= thirty_days_ago
     ).group_by(
         func.date(Announcement.created_at)
-    ).order_by('date').all()
-    
-    # Most recent content
-    recent_news = db.query(News).order_by(News.created_at.desc()).limit(5).all()
-    recent_announcements = db.query(Announcement).order_by(Announcement.created_at.desc()).limit(5).all()
+    ).order_by('date')
+    
+    # Most recent content, only the columns that are returned
+    recent_news_query = select(
+        News.id, News.title_uz, News.title_ru, News.title_en,
+        News.created_at, News.is_active, News.is_featured
+    ).order_by(News.created_at.desc()).limit(5)
+    recent_announcements_query = select(
+        Announcement.id, Announcement.title_uz, Announcement.title_ru, Announcement.title_en,
+        Announcement.created_at, Announcement.is_active
+    ).order_by(Announcement.created_at.desc()).limit(5)
+    
+    daily_news, daily_announcements, recent_news, recent_announcements = await asyncio.gather(
+        _fetch_all(daily_news_query),
+        _fetch_all(daily_announcements_query),
+        _fetch_all(recent_news_query),
+        _fetch_all(recent_announcements_query)
+    )
     
     return {
         "daily_news": [
@@ -181,60 +155,63 @@ async def get_content_analytics(
             {"date": str(item.date), "count": item.count}
             for item in daily_announcements
         ],
-        "recent_news": [
-            {
-                "id": news.id,
-                "title_uz": news.title_uz,
-                "title_ru": news.title_ru,
-                "title_en": news.title_en,
-                "created_at": news.created_at,
-                "is_active": news.is_active,
-                "is_featured": news.is_featured
-            }
-            for news in recent_news
-        ],
-        "recent_announcements": [
-            {
-                "id": announcement.id,
-                "title_uz": announcement.title_uz,
-                "title_ru": announcement.title_ru,
-                "title_en": announcement.title_en,
-                "created_at": announcement.created_at,
-                "is_active": announcement.is_active
-            }
-            for announcement in recent_announcements
-        ]
+        "recent_news": [dict(news._mapping) for news in recent_news],
+        "recent_announcements": [dict(announcement._mapping) for announcement in recent_announcements]
     }
 
 @router.get("/system/info")
+@cache.cached("admin")
 async def get_system_info(
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    exact: bool = Query(False, description="Count rows exactly instead of using PostgreSQL's estimates")
 ):
     """Get system information for admin panel"""
     
-    # Database statistics
-    tables_info = {}
-    
     # Count records in each main table
-    model_counts = {
-        "users": db.query(User).count(),
-        "news": db.query(News).count(),
-        "announcements": db.query(Announcement).count(),
-        "laws": db.query(Law).count(),
-        "urban_norms": db.query(UrbanNorm).count(),
-        "standards": db.query(Standard).count(),
-        "building_regulations": db.query(BuildingRegulation).count(),
-        "smeta_resource_norms": db.query(SmetaResourceNorm).count(),
-        "references": db.query(Reference).count(),
-        "management": db.query(Management).count(),
-        "structural_divisions": db.query(StructuralDivision).count(),
-        "vacancies": db.query(Vacancy).count(),
-        "contacts": db.query(Contact).count(),
-        "management_systems": db.query(ManagementSystem).count(),
-        "laboratories": db.query(Laboratory).count(),
-        "anti_corruption": db.query(AntiCorruption).count()
+    counted_models = {
+        "users": User,
+        "news": News,
+        "announcements": Announcement,
+        "laws": Law,
+        "urban_norms": UrbanNorm,
+        "standards": Standard,
+        "building_regulations": BuildingRegulation,
+        "smeta_resource_norms": SmetaResourceNorm,
+        "references": Reference,
+        "management": Management,
+        "structural_divisions": StructuralDivision,
+        "vacancies": Vacancy,
+        "contacts": Contact,
+        "management_systems": ManagementSystem,
+        "laboratories": Laboratory,
+        "anti_corruption": AntiCorruption
     }
+    model_counts = None
+    estimated = False
+    if not exact and db.get_bind().dialect.name == "postgresql":
+        # Planner estimates from pg_class: one catalog lookup instead of 16 scans
+        estimates = dict((await db.execute(
+            text(
+                "SELECT relname, reltuples::bigint FROM pg_class "
+                "WHERE relkind = 'r' AND relname IN :names AND pg_table_is_visible(oid)"
+            ).bindparams(bindparam("names", expanding=True)),
+            {"names": [model.__tablename__ for model in counted_models.values()]}
+        )).all())
+        # reltuples is -1 until a table has been vacuumed or analyzed
+        if all(estimates.get(model.__tablename__, -1) >= 0 for model in counted_models.values()):
+            model_counts = {
+                name: estimates[model.__tablename__]
+                for name, model in counted_models.items()
+            }
+            estimated = True
+    
+    if model_counts is None:
+        counts = (await db.execute(select(*[
+            select(func.count()).select_from(model).scalar_subquery().label(name)
+            for name, model in counted_models.items()
+        ]))).one()
+        model_counts = counts._asdict()
     
     # System settings
     system_settings = {
@@ -249,6 +226,7 @@ async def get_system_info(
     
     return {
         "database_statistics": model_counts,
+        "database_statistics_exact": not estimated,
         "system_settings": system_settings,
         "server_time": datetime.utcnow().isoformat(),
         "api_version": "1.0.0"
@@ -257,47 +235,58 @@ async def get_system_info(
 @router.get("/logs/recent")
 async def get_recent_logs(
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     limit: int = Query(50, ge=1, le=100)
 ):
     """Get recent activity logs for admin panel"""
     
     # This is a simplified log system - in production you might want to implement proper logging
-    recent_activities = []
     
-    # Recent user registrations
-    recent_users = db.query(User).order_by(User.created_at.desc()).limit(10).all()
-    for user in recent_users:
-        recent_activities.append({
-            "type": "user_registration",
-            "description": f"New user registered: {user.username}",
-            "timestamp": user.created_at,
-            "user": user.username
-        })
-    
-    # Recent content creation
-    recent_news = db.query(News).order_by(News.created_at.desc()).limit(10).all()
-    for news in recent_news:
-        recent_activities.append({
-            "type": "content_creation",
-            "description": f"New news created: {news.title_uz[:50]}...",
-            "timestamp": news.created_at,
-            "content_type": "news"
-        })
-    
-    # Recent contacts
-    recent_contacts = db.query(Contact).order_by(Contact.created_at.desc()).limit(10).all()
-    for contact in recent_contacts:
-        recent_activities.append({
-            "type": "contact_inquiry",
-            "description": f"New contact from: {contact.full_name}",
-            "timestamp": contact.created_at,
-            "email": contact.email
-        })
-    
-    # Sort by timestamp and limit
-    recent_activities.sort(key=lambda x: x["timestamp"], reverse=True)
-    recent_activities = recent_activities[:limit]
+    # Merge, sort and limit the three sources in one UNION ALL query
+    activity_query = union_all(
+        select(
+            literal("user_registration").label("type"),
+            User.username.label("name"),
+            null().label("email"),
+            User.created_at.label("created_at")
+        ),
+        select(
+            literal("content_creation"),
+            News.title_uz,
+            null(),
+            News.created_at
+        ),
+        select(
+            literal("contact_inquiry"),
+            Contact.full_name,
+            Contact.email,
+            Contact.created_at
+        )
+    ).order_by(literal_column("created_at").desc()).limit(limit)
+    
+    recent_activities = []
+    for activity in (await db.execute(activity_query)).all():
+        if activity.type == "user_registration":
+            recent_activities.append({
+                "type": "user_registration",
+                "description": f"New user registered: {activity.name}",
+                "timestamp": activity.created_at,
+                "user": activity.name
+            })
+        elif activity.type == "content_creation":
+            recent_activities.append({
+                "type": "content_creation",
+                "description": f"New news created: {activity.name[:50]}...",
+                "timestamp": activity.created_at,
+                "content_type": "news"
+            })
+        else:
+            recent_activities.append({
+                "type": "contact_inquiry",
+                "description": f"New contact from: {activity.name}",
+                "timestamp": activity.created_at,
+                "email": activity.email
+            })
     
     return {
         "activities": recent_activities,
@@ -307,7 +296,7 @@ async def get_recent_logs(
 @router.post("/maintenance/cleanup")
 async def cleanup_inactive_content(
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Cleanup inactive content and old records"""
     
@@ -315,14 +304,16 @@ async def cleanup_inactive_content(
     
     # Mark very old unread contacts as read (older than 90 days)
     ninety_days_ago = datetime.utcnow() - timedelta(days=90)
-    old_contacts = db.query(Contact).filter(
-        and_(
-            Contact.is_read == False,
-            Contact.created_at < ninety_days_ago
-        )
-    ).update({"is_read": True})
+    old_contacts = await db.execute(
+        update(Contact).where(
+            and_(
+                Contact.is_read == False,
+                Contact.created_at < ninety_days_ago
+            )
+        ).values(is_read=True).execution_options(synchronize_session=False)
+    )
     
-    cleanup_results["old_contacts_marked_read"] = old_contacts
+    cleanup_results["old_contacts_marked_read"] = old_contacts.rowcount
     
     # You can add more cleanup operations here
     # For example:
@@ -330,7 +321,9 @@ async def cleanup_inactive_content(
     # - Clean up orphaned files
     # - Archive old data
     
-    db.commit()
+    await db.commit()
+    await refresh_dashboard_counters()
+    await cache.invalidate("admin")
     
     return {
         "message": "Cleanup completed successfully",
@@ -342,98 +335,92 @@ async def cleanup_inactive_content(
 async def global_search(
     q: str = Query(..., min_length=2),
     current_user: User = Depends(get_moderator_user),
-    db: Session = Depends(get_db),
     limit: int = Query(10, ge=1, le=50)
 ):
     """Global search across all content types for admin panel"""
     
-    results = {}
-    
-    # Search in news
-    news_results = db.query(News).filter(
-        or_(
-            News.title_uz.contains(q),
-            News.title_ru.contains(q),
-            News.title_en.contains(q),
-            News.content_uz.contains(q),
-            News.content_ru.contains(q),
-            News.content_en.contains(q)
+    # Each search runs in its own session so the four queries overlap,
+    # and only the columns returned to the client are selected
+    async def search_news():
+        rows = await _fetch_all(
+            select(News.id, News.title_uz, News.created_at, News.is_active).where(
+                *generate_search_filters(
+                    q, ["title_uz", "title_ru", "title_en", "content_uz", "content_ru", "content_en"], News
+                )
+            ).limit(limit)
         )
-    ).limit(limit).all()
-    
-    results["news"] = [
-        {
-            "id": news.id,
-            "title_uz": news.title_uz,
-            "type": "news",
-            "created_at": news.created_at,
-            "is_active": news.is_active
-        }
-        for news in news_results
-    ]
-    
-    # Search in users
-    user_results = db.query(User).filter(
-        or_(
-            User.username.contains(q),
-            User.full_name.contains(q),
-            User.email.contains(q)
+        return [
+            {
+                "id": news.id,
+                "title_uz": news.title_uz,
+                "type": "news",
+                "created_at": news.created_at,
+                "is_active": news.is_active
+            }
+            for news in rows
+        ]
+    
+    async def search_users():
+        rows = await _fetch_all(
+            select(User.id, User.username, User.full_name, User.is_active).where(
+                *generate_search_filters(q, ["username", "full_name", "email"], User)
+            ).limit(limit)
         )
-    ).limit(limit).all()
-    
-    results["users"] = [
-        {
-            "id": user.id,
-            "username": user.username,
-            "full_name": user.full_name,
-            "type": "user",
-            "is_active": user.is_active
-        }
-        for user in user_results
-    ]
-    
-    # Search in laws
-    law_results = db.query(Law).filter(
-        or_(
-            Law.name_uz.contains(q),
-            Law.name_ru.contains(q),
-            Law.name_en.contains(q),
-            Law.order_number.contains(q)
+        return [
+            {
+                "id": user.id,
+                "username": user.username,
+                "full_name": user.full_name,
+                "type": "user",
+                "is_active": user.is_active
+            }
+            for user in rows
+        ]
+    
+    async def search_laws():
+        rows = await _fetch_all(
+            select(Law.id, Law.name_uz, Law.order_number, Law.is_active).where(
+                *generate_search_filters(q, ["name_uz", "name_ru", "name_en", "order_number"], Law)
+            ).limit(limit)
         )
-    ).limit(limit).all()
-    
-    results["laws"] = [
-        {
-            "id": law.id,
-            "name_uz": law.name_uz,
-            "order_number": law.order_number,
-            "type": "law",
-            "is_active": law.is_active
-        }
-        for law in law_results
-    ]
-    
-    # Search in contacts
-    contact_results = db.query(Contact).filter(
-        or_(
-            Contact.full_name.contains(q),
-            Contact.email.contains(q),
-            Contact.subject.contains(q),
-            Contact.message.contains(q)
+        return [
+            {
+                "id": law.id,
+                "name_uz": law.name_uz,
+                "order_number": law.order_number,
+                "type": "law",
+                "is_active": law.is_active
+            }
+            for law in rows
+        ]
+    
+    async def search_contacts():
+        rows = await _fetch_all(
+            select(Contact.id, Contact.full_name, Contact.email, Contact.created_at, Contact.is_read).where(
+                *generate_search_filters(q, ["full_name", "email", "subject", "message"], Contact)
+            ).limit(limit)
         )
-    ).limit(limit).all()
-    
-    results["contacts"] = [
-        {
-            "id": contact.id,
-            "full_name": contact.full_name,
-            "email": contact.email,
-            "type": "contact",
-            "created_at": contact.created_at,
-            "is_read": contact.is_read
-        }
-        for contact in contact_results
-    ]
+        return [
+            {
+                "id": contact.id,
+                "full_name": contact.full_name,
+                "email": contact.email,
+                "type": "contact",
+                "created_at": contact.created_at,
+                "is_read": contact.is_read
+            }
+            for contact in rows
+        ]
+    
+    news, users, laws, contacts = await asyncio.gather(
+        search_news(), search_users(), search_laws(), search_contacts()
+    )
+    results = {
+        "news": news,
+        "users": users,
+        "laws": laws,
+        "contacts": contacts
+    }
     
     # Calculate total results
     total_results = sum(len(results[key]) for key in results)
@@ -448,14 +435,10 @@ async def global_search(
 async def export_data(
     current_user: User = Depends(get_admin_user),
     table: str = Query(..., description="Table name to export"),
-    format: str = Query("json", regex="^(json|csv)$"),
-    db: Session = Depends(get_db)
+    format: str = Query("json", regex="^(json|csv)$")
 ):
     """Export data from specific tables for backup/analysis"""
     
-    # This is a basic implementation - in production you might want to use
-    # more sophisticated export tools and add proper file handling
-    
     supported_tables = {
         "users": User,
         "news": News,
@@ -471,23 +454,54 @@ async def export_data(
         )
     
     model = supported_tables[table]
-    data = db.query(model).all()
-    
-    # Convert to dictionary format
-    export_data = []
-    for item in data:
-        item_dict = {}
-        for column in item.__table__.columns:
-            value = getattr(item, column.name)
-            if isinstance(value, datetime):
-                value = value.isoformat()
-            item_dict[column.name] = value
-        export_data.append(item_dict)
+    columns = model.__table__.columns
+    # Plain column tuples read through a server-side cursor in batches,
+    # so memory stays bounded by the batch size instead of the table size
+    statement = select(*columns).execution_options(
+        stream_results=True,
+        yield_per=EXPORT_BATCH_SIZE
+    )
+    exported_at = datetime.utcnow().isoformat()
+    
+    async def stream_partitions():
+        # The request's session is closed before the body is streamed,
+        # so the export uses a session of its own
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(statement)
+            async for partition in result.partitions(EXPORT_BATCH_SIZE):
+                yield partition
+    
+    async def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([column.name for column in columns])
+        async for partition in stream_partitions():
+            writer.writerows(partition)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    
+    async def generate_json():
+        yield json.dumps({"table": table, "format": format, "exported_at": exported_at})[:-1]
+        yield ', "data": ['
+        record_count = 0
+        async for partition in stream_partitions():
+            chunk = ", ".join(
+                json.dumps({column.name: _export_value(value) for column, value in zip(columns, row)})
+                for row in partition
+            )
+            yield (", " if record_count else "") + chunk
+            record_count += len(partition)
+        yield f'], "record_count": {record_count}}}'
+    
+    if format == "csv":
+        filename = f"{table}_{datetime.utcnow():%Y%m%d_%H%M%S}.csv"
+        return StreamingResponse(
+            generate_csv(),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
     
-    return {
-        "table": table,
-        "format": format,
-        "record_count": len(export_data),
-        "exported_at": datetime.utcnow().isoformat(),
-        "data": export_data
-    }
+    return StreamingResponse(generate_json(), media_type="application/json")
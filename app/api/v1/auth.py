@@ -1,19 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from sqlalchemy import or_, select, bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_db, AsyncSessionLocal
 from app.db.models.user import User
 from app.schemas.user import UserLogin, Token, UserCreate, User as UserSchema
 from app.core.security import verify_password, create_access_token, create_refresh_token, get_password_hash, decode_token
+from app.core.cache import cache
+from app.core.config import settings
+from app.services.utils import insert_row
 from datetime import datetime
+from types import SimpleNamespace
+import orjson
 
 router = APIRouter()
 security = HTTPBearer()
 
-def get_user_by_username(db: Session, username: str):
-    return db.query(User).filter(User.username == username).first()
+# Built once and reused so the hot authentication path hits SQLAlchemy's
+# compiled statement cache instead of constructing a new query each time
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+PRINCIPAL_KEY = "tmsiti:principal:{user_id}"
+PRINCIPAL_FIELDS = ("id", "is_active", "is_admin", "is_moderator")
+# Role checks only need the status flags, so skip hydrating a full User
+PRINCIPAL_BY_ID = select(*(getattr(User, field) for field in PRINCIPAL_FIELDS)).where(User.id == bindparam("user_id"))
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    return await db.scalar(USER_BY_USERNAME, {"username": username})
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_db)):
     token = credentials.credentials
     payload = decode_token(token)
     user_id = payload.get("sub")
@@ -22,7 +39,7 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await db.scalar(USER_BY_ID, {"user_id": int(user_id)})
     if user is None or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -30,7 +47,42 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         )
     return user
 
-def get_admin_user(current_user: User = Depends(get_current_user)):
+async def invalidate_principal(user_id: int):
+    """Drop the cached principal after a user's status or role changes"""
+    await cache.delete(PRINCIPAL_KEY.format(user_id=user_id))
+
+async def get_current_principal(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_db)):
+    """Lightweight current user for role checks, cached for a short time.
+
+    Only carries id and status flags; use get_current_user when the full
+    user row is needed.
+    """
+    payload = decode_token(credentials.credentials)
+    user_id = payload.get("sub")
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+    
+    key = PRINCIPAL_KEY.format(user_id=int(user_id))
+    cached = await cache.get(key)
+    if cached is not None:
+        principal = orjson.loads(cached)
+    else:
+        row = (await db.execute(PRINCIPAL_BY_ID, {"user_id": int(user_id)})).one_or_none()
+        principal = row._asdict() if row else None
+        if principal is not None:
+            await cache.set(key, orjson.dumps(principal), settings.principal_cache_ttl)
+    
+    if principal is None or not principal["is_active"]:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found or inactive",
+        )
+    return SimpleNamespace(**principal)
+
+def get_admin_user(current_user = Depends(get_current_principal)):
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -38,7 +90,7 @@ def get_admin_user(current_user: User = Depends(get_current_user)):
         )
     return current_user
 
-def get_moderator_user(current_user: User = Depends(get_current_user)):
+def get_moderator_user(current_user = Depends(get_current_principal)):
     if not (current_user.is_admin or current_user.is_moderator):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -46,44 +98,56 @@ def get_moderator_user(current_user: User = Depends(get_current_user)):
         )
     return current_user
 
+async def update_last_login(user_id: int, logged_in_at: datetime):
+    """Record the login time after the response has been sent"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(User).where(User.id == user_id).values(last_login=logged_in_at)
+        )
+        await db.commit()
+
 @router.post("/register", response_model=UserSchema)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    # Check if user already exists
-    if get_user_by_username(db, user_data.username):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+    # Check username and email in one lookup, before paying for the password hash
+    taken = (await db.execute(
+        select(User.username, User.email).where(
+            or_(User.username == user_data.username, User.email == user_data.email)
+        )
+    )).all()
+    if any(row.username == user_data.username for row in taken):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
-    
-    # Check if email already exists
-    if db.query(User).filter(User.email == user_data.email).first():
+    if taken:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
-    db_user = User(
-        username=user_data.username,
-        email=user_data.email,
-        full_name=user_data.full_name,
-        phone=user_data.phone,
-        bio=user_data.bio,
-        hashed_password=hashed_password
-    )
-    
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    # Create new user; bcrypt is slow and releases the GIL, so hash in a worker thread
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
+    db_user = await insert_row(db, User, {
+        "username": user_data.username,
+        "email": user_data.email,
+        "full_name": user_data.full_name,
+        "phone": user_data.phone,
+        "bio": user_data.bio,
+        "hashed_password": hashed_password
+    })
+    await db.commit()
     
     return db_user
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = get_user_by_username(db, user_credentials.username)
+async def login(
+    user_credentials: UserLogin,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+):
+    user = await get_user_by_username(db, user_credentials.username)
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    if not user or not await run_in_threadpool(verify_password, user_credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -95,9 +159,8 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
             detail="User account is inactive",
         )
     
-    # Update last login
-    user.last_login = datetime.utcnow()
-    db.commit()
+    # Update last login without holding up the response
+    background_tasks.add_task(update_last_login, user.id, datetime.utcnow())
     
     # Create tokens
     access_token = create_access_token(subject=user.id)
@@ -110,7 +173,7 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     }
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+async def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_db)):
     token = credentials.credentials
     payload = decode_token(token)
     
@@ -121,7 +184,7 @@ async def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(secu
         )
     
     user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await db.scalar(USER_BY_ID, {"user_id": int(user_id)})
     
     if not user or not user.is_active:
         raise HTTPException(
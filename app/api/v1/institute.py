@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.db.database import get_db
 from app.db.models.institute import About, Management, Structure, StructuralDivision, Vacancy
@@ -11,16 +12,23 @@ from app.schemas.institute import (
     Vacancy as VacancySchema, VacancyCreate, VacancyUpdate
 )
 from app.api.v1.auth import get_moderator_user
-from app.services.utils import save_uploaded_file
-import os
+from app.services.utils import save_uploaded_file, fulltext_search_filter, delete_file_async, paginate_newest_first, update_by_id, localized_columns, upsert_active_singleton
+from app.core.cache import cache
+from app.core.rate_limit import search_rate_limit
+from app.core.config import settings
 
 router = APIRouter()
 
+# Search columns per language, in the order of the models' full-text indexes
+DIVISION_DEPARTMENT_COLUMNS = localized_columns(StructuralDivision, "department")
+VACANCY_DEPARTMENT_COLUMNS = localized_columns(Vacancy, "department")
+
 # About endpoints
 @router.get("/about", response_model=AboutSchema)
-async def get_about(db: Session = Depends(get_db)):
+@cache.cached("institute", ttl=settings.cache_long_ttl, response_model=AboutSchema)
+async def get_about(db: AsyncSession = Depends(get_db)):
     """Get institute about information"""
-    about = db.query(About).filter(About.is_active == True).first()
+    about = await db.scalar(select(About).where(About.is_active == True).limit(1))
     if not about:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -32,35 +40,23 @@ async def get_about(db: Session = Depends(get_db)):
 async def create_about(
     about_data: AboutCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create or update about information (moderator/admin only)"""
-    # Check if about already exists
-    existing_about = db.query(About).filter(About.is_active == True).first()
-    if existing_about:
-        # Update existing
-        update_data = about_data.dict()
-        for field, value in update_data.items():
-            setattr(existing_about, field, value)
-        db.commit()
-        db.refresh(existing_about)
-        return existing_about
-    else:
-        # Create new
-        db_about = About(**about_data.dict())
-        db.add(db_about)
-        db.commit()
-        db.refresh(db_about)
-        return db_about
+    # One statement, and the unique index keeps a single active row
+    about = await upsert_active_singleton(db, About, about_data.model_dump())
+    await db.commit()
+    await cache.invalidate("institute")
+    return about
 
 @router.post("/about/upload-certificate")
 async def upload_about_certificate(
     file: UploadFile = File(...),
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload certificate PDF for about section"""
-    about = db.query(About).filter(About.is_active == True).first()
+    about = await db.scalar(select(About).where(About.is_active == True).limit(1))
     if not about:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -71,52 +67,48 @@ async def upload_about_certificate(
     file_path = await save_uploaded_file(file, "about", ["document"])
     
     # Remove old certificate if exists
-    if about.certificate_pdf_path and os.path.exists(about.certificate_pdf_path):
-        os.remove(about.certificate_pdf_path)
+    if about.certificate_pdf_path:
+        await delete_file_async(about.certificate_pdf_path)
     
     about.certificate_pdf_path = file_path
-    db.commit()
+    await db.commit()
+    await cache.invalidate("institute")
     
     return {"message": "Certificate uploaded successfully", "file_path": file_path}
 
 # Management endpoints
-@router.get("/management", response_model=List[ManagementSchema])
+@router.get("/management", response_model=List[ManagementSchema], dependencies=[Depends(search_rate_limit)])
+@cache.cached("institute", ttl=settings.cache_long_ttl, response_model=List[ManagementSchema])
 async def get_management(
-    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=settings.max_page_size),
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get management list"""
-    query = db.query(Management).filter(Management.is_active == True)
+    query = select(Management).where(Management.is_active == True)
     
     if search:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(
-                Management.full_name_uz.contains(search) | 
-                Management.position_uz.contains(search)
-            )
-        elif language == 'ru':
-            query = query.filter(
-                Management.full_name_ru.contains(search) | 
-                Management.position_ru.contains(search)
-            )
-        elif language == 'en':
-            query = query.filter(
-                Management.full_name_en.contains(search) | 
-                Management.position_en.contains(search)
-            )
+        query = query.where(fulltext_search_filter(search, Management))
+    
+    # Total for the same filters, served from the active-row index
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    response.headers["X-Total-Count"] = str(total)
     
-    management = query.order_by(Management.display_order.asc()).all()
-    return management
+    management = await db.scalars(
+        query.order_by(Management.display_order.asc(), Management.id.asc()).offset(skip).limit(limit)
+    )
+    return management.all()
 
 @router.get("/management/{management_id}", response_model=ManagementSchema)
-async def get_management_member(management_id: int, db: Session = Depends(get_db)):
+@cache.cached("institute", ttl=settings.cache_long_ttl, response_model=ManagementSchema)
+async def get_management_member(management_id: int, db: AsyncSession = Depends(get_db)):
     """Get single management member"""
-    member = db.query(Management).filter(
+    member = await db.scalar(select(Management).where(
         Management.id == management_id, 
         Management.is_active == True
-    ).first()
+    ))
     if not member:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -128,13 +120,14 @@ async def get_management_member(management_id: int, db: Session = Depends(get_db
 async def create_management_member(
     member_data: ManagementCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new management member (moderator/admin only)"""
-    db_member = Management(**member_data.dict())
+    db_member = Management(**member_data.model_dump())
     db.add(db_member)
-    db.commit()
-    db.refresh(db_member)
+    await db.commit()
+    await db.refresh(db_member)
+    await cache.invalidate("institute")
     return db_member
 
 @router.put("/management/{management_id}", response_model=ManagementSchema)
@@ -142,22 +135,18 @@ async def update_management_member(
     management_id: int,
     member_update: ManagementUpdate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update management member (moderator/admin only)"""
-    member = db.query(Management).filter(Management.id == management_id).first()
+    member = await update_by_id(db, Management, management_id, member_update.model_dump(exclude_unset=True))
     if not member:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Management member not found"
         )
     
-    update_data = member_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(member, field, value)
-    
-    db.commit()
-    db.refresh(member)
+    await db.commit()
+    await cache.invalidate("institute")
     return member
 
 @router.post("/management/{management_id}/upload-photo")
@@ -165,10 +154,10 @@ async def upload_management_photo(
     management_id: int,
     file: UploadFile = File(...),
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload photo for management member"""
-    member = db.query(Management).filter(Management.id == management_id).first()
+    member = await db.get(Management, management_id)
     if not member:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -179,19 +168,21 @@ async def upload_management_photo(
     file_path = await save_uploaded_file(file, "management", ["image"])
     
     # Remove old photo if exists
-    if member.photo_path and os.path.exists(member.photo_path):
-        os.remove(member.photo_path)
+    if member.photo_path:
+        await delete_file_async(member.photo_path)
     
     member.photo_path = file_path
-    db.commit()
+    await db.commit()
+    await cache.invalidate("institute")
     
     return {"message": "Photo uploaded successfully", "file_path": file_path}
 
 # Structure endpoints
 @router.get("/structure", response_model=StructureSchema)
-async def get_structure(db: Session = Depends(get_db)):
+@cache.cached("institute", ttl=settings.cache_long_ttl, response_model=StructureSchema)
+async def get_structure(db: AsyncSession = Depends(get_db)):
     """Get organizational structure"""
-    structure = db.query(Structure).filter(Structure.is_active == True).first()
+    structure = await db.scalar(select(Structure).where(Structure.is_active == True).limit(1))
     if not structure:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -203,141 +194,105 @@ async def get_structure(db: Session = Depends(get_db)):
 async def create_structure(
     structure_data: StructureCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create or update structure (moderator/admin only)"""
-    existing_structure = db.query(Structure).filter(Structure.is_active == True).first()
-    if existing_structure:
-        # Update existing
-        update_data = structure_data.dict()
-        for field, value in update_data.items():
-            setattr(existing_structure, field, value)
-        db.commit()
-        db.refresh(existing_structure)
-        return existing_structure
-    else:
-        # Create new
-        db_structure = Structure(**structure_data.dict())
-        db.add(db_structure)
-        db.commit()
-        db.refresh(db_structure)
-        return db_structure
+    # One statement, and the unique index keeps a single active row
+    structure = await upsert_active_singleton(db, Structure, structure_data.model_dump())
+    await db.commit()
+    await cache.invalidate("institute")
+    return structure
 
 # Structural Divisions endpoints
-@router.get("/structural-divisions", response_model=List[StructuralDivisionSchema])
+@router.get("/structural-divisions", response_model=List[StructuralDivisionSchema], dependencies=[Depends(search_rate_limit)])
+@cache.cached("institute", ttl=settings.cache_long_ttl, response_model=List[StructuralDivisionSchema])
 async def get_structural_divisions(
     request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=settings.max_page_size),
     search: Optional[str] = None,
     department: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get structural divisions list"""
-    query = db.query(StructuralDivision).filter(StructuralDivision.is_active == True)
+    query = select(StructuralDivision).where(StructuralDivision.is_active == True)
     
+    # Search covers every language; department matches the request language only
+    conditions = []
     if search:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(
-                StructuralDivision.full_name_uz.contains(search) | 
-                StructuralDivision.position_uz.contains(search) |
-                StructuralDivision.department_uz.contains(search)
-            )
-        elif language == 'ru':
-            query = query.filter(
-                StructuralDivision.full_name_ru.contains(search) | 
-                StructuralDivision.position_ru.contains(search) |
-                StructuralDivision.department_ru.contains(search)
-            )
-        elif language == 'en':
-            query = query.filter(
-                StructuralDivision.full_name_en.contains(search) | 
-                StructuralDivision.position_en.contains(search) |
-                StructuralDivision.department_en.contains(search)
-            )
+        conditions.append(fulltext_search_filter(search, StructuralDivision))
+    department_columns = DIVISION_DEPARTMENT_COLUMNS.get(getattr(request.state, 'language', 'uz'))
+    if department and department_columns:
+        conditions.append(department_columns[0].contains(department))
+    query = query.where(*conditions)
     
-    if department:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(StructuralDivision.department_uz.contains(department))
-        elif language == 'ru':
-            query = query.filter(StructuralDivision.department_ru.contains(department))
-        elif language == 'en':
-            query = query.filter(StructuralDivision.department_en.contains(department))
+    # Total for the same filters, served from the active-row index
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    response.headers["X-Total-Count"] = str(total)
     
-    divisions = query.order_by(StructuralDivision.display_order.asc()).all()
-    return divisions
+    divisions = await db.scalars(
+        query.order_by(StructuralDivision.display_order.asc(), StructuralDivision.id.asc()).offset(skip).limit(limit)
+    )
+    return divisions.all()
 
 @router.post("/structural-divisions", response_model=StructuralDivisionSchema)
 async def create_structural_division(
     division_data: StructuralDivisionCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new structural division member (moderator/admin only)"""
-    db_division = StructuralDivision(**division_data.dict())
+    db_division = StructuralDivision(**division_data.model_dump())
     db.add(db_division)
-    db.commit()
-    db.refresh(db_division)
+    await db.commit()
+    await db.refresh(db_division)
+    await cache.invalidate("institute")
     return db_division
 
 # Vacancies endpoints
-@router.get("/vacancies", response_model=List[VacancySchema])
+@router.get("/vacancies", response_model=List[VacancySchema], dependencies=[Depends(search_rate_limit)])
+@cache.cached("institute", ttl=settings.cache_long_ttl, response_model=List[VacancySchema])
 async def get_vacancies(
     request: Request,
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    after_id: Optional[int] = None,
     search: Optional[str] = None,
     department: Optional[str] = None,
     active_only: bool = True,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get vacancies list"""
-    query = db.query(Vacancy)
+    query = select(Vacancy)
     
     if active_only:
-        query = query.filter(Vacancy.is_active == True)
+        query = query.where(Vacancy.is_active == True)
     
+    # Search covers every language; department matches the request language only
+    conditions = []
     if search:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(
-                Vacancy.position_uz.contains(search) | 
-                Vacancy.department_uz.contains(search)
-            )
-        elif language == 'ru':
-            query = query.filter(
-                Vacancy.position_ru.contains(search) | 
-                Vacancy.department_ru.contains(search)
-            )
-        elif language == 'en':
-            query = query.filter(
-                Vacancy.position_en.contains(search) | 
-                Vacancy.department_en.contains(search)
-            )
+        conditions.append(fulltext_search_filter(search, Vacancy))
+    department_columns = VACANCY_DEPARTMENT_COLUMNS.get(getattr(request.state, 'language', 'uz'))
+    if department and department_columns:
+        conditions.append(department_columns[0].contains(department))
+    query = query.where(*conditions)
     
-    if department:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(Vacancy.department_uz.contains(department))
-        elif language == 'ru':
-            query = query.filter(Vacancy.department_ru.contains(department))
-        elif language == 'en':
-            query = query.filter(Vacancy.department_en.contains(department))
-    
-    vacancies = query.order_by(Vacancy.created_at.desc()).offset(skip).limit(limit).all()
-    return vacancies
+    vacancies = await db.scalars(paginate_newest_first(query, Vacancy, "created_at", skip, limit, after_id))
+    return vacancies.all()
 
 @router.post("/vacancies", response_model=VacancySchema)
 async def create_vacancy(
     vacancy_data: VacancyCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new vacancy (moderator/admin only)"""
-    db_vacancy = Vacancy(**vacancy_data.dict())
+    db_vacancy = Vacancy(**vacancy_data.model_dump())
     db.add(db_vacancy)
-    db.commit()
-    db.refresh(db_vacancy)
+    await db.commit()
+    await db.refresh(db_vacancy)
+    await cache.invalidate("institute")
     return db_vacancy
 
 @router.put("/vacancies/{vacancy_id}", response_model=VacancySchema)
@@ -345,20 +300,16 @@ async def update_vacancy(
     vacancy_id: int,
     vacancy_update: VacancyUpdate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update vacancy (moderator/admin only)"""
-    vacancy = db.query(Vacancy).filter(Vacancy.id == vacancy_id).first()
+    vacancy = await update_by_id(db, Vacancy, vacancy_id, vacancy_update.model_dump(exclude_unset=True))
     if not vacancy:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Vacancy not found"
         )
     
-    update_data = vacancy_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(vacancy, field, value)
-    
-    db.commit()
-    db.refresh(vacancy)
+    await db.commit()
+    await cache.invalidate("institute")
     return vacancy
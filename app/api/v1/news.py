@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.db.database import get_db
 from app.db.models.news import News, Announcement
@@ -8,43 +9,41 @@ from app.schemas.news import (
     Announcement as AnnouncementSchema, AnnouncementCreate, AnnouncementUpdate
 )
 from app.api.v1.auth import get_moderator_user
-from app.services.utils import save_uploaded_file, get_localized_content
-import os
+from app.services.utils import save_uploaded_file, get_localized_content, fulltext_search_filter, delete_file_async, delete_files, paginate_newest_first, update_by_id
+from app.core.cache import cache
+from app.core.rate_limit import search_rate_limit
+from app.core.config import settings
 
 router = APIRouter()
 
 # News endpoints
-@router.get("/", response_model=List[NewsSchema])
+@router.get("/", response_model=List[NewsSchema], dependencies=[Depends(search_rate_limit)])
+@cache.cached("news", ttl=settings.cache_long_ttl, response_model=List[NewsSchema])
 async def get_news(
-    request: Request,
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    after_id: Optional[int] = None,
     search: Optional[str] = None,
     featured: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get news list with pagination and search"""
-    query = db.query(News).filter(News.is_active == True)
+    query = select(News).where(News.is_active == True)
     
     if featured is not None:
-        query = query.filter(News.is_featured == featured)
+        query = query.where(News.is_featured == featured)
     
     if search:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(News.title_uz.contains(search) | News.content_uz.contains(search))
-        elif language == 'ru':
-            query = query.filter(News.title_ru.contains(search) | News.content_ru.contains(search))
-        elif language == 'en':
-            query = query.filter(News.title_en.contains(search) | News.content_en.contains(search))
-    
-    news = query.order_by(News.published_date.desc()).offset(skip).limit(limit).all()
-    return news
+        query = query.where(fulltext_search_filter(search, News))
+    
+    news = await db.scalars(paginate_newest_first(query, News, "published_date", skip, limit, after_id))
+    return news.all()
 
 @router.get("/{news_id}", response_model=NewsSchema)
-async def get_news_item(news_id: int, db: Session = Depends(get_db)):
+@cache.cached("news", ttl=settings.cache_long_ttl, response_model=NewsSchema)
+async def get_news_item(news_id: int, db: AsyncSession = Depends(get_db)):
     """Get single news item"""
-    news = db.query(News).filter(News.id == news_id, News.is_active == True).first()
+    news = await db.scalar(select(News).where(News.id == news_id, News.is_active == True))
     if not news:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -56,13 +55,14 @@ async def get_news_item(news_id: int, db: Session = Depends(get_db)):
 async def create_news(
     news_data: NewsCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new news (moderator/admin only)"""
-    db_news = News(**news_data.dict())
+    db_news = News(**news_data.model_dump())
     db.add(db_news)
-    db.commit()
-    db.refresh(db_news)
+    await db.commit()
+    await db.refresh(db_news)
+    await cache.invalidate("news")
     return db_news
 
 @router.put("/{news_id}", response_model=NewsSchema)
@@ -70,22 +70,18 @@ async def update_news(
     news_id: int,
     news_update: NewsUpdate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update news (moderator/admin only)"""
-    news = db.query(News).filter(News.id == news_id).first()
+    news = await update_by_id(db, News, news_id, news_update.model_dump(exclude_unset=True))
     if not news:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="News not found"
         )
     
-    update_data = news_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(news, field, value)
-    
-    db.commit()
-    db.refresh(news)
+    await db.commit()
+    await cache.invalidate("news")
     return news
 
 @router.post("/{news_id}/upload-image")
@@ -93,10 +89,10 @@ async def upload_news_image(
     news_id: int,
     file: UploadFile = File(...),
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload image for news"""
-    news = db.query(News).filter(News.id == news_id).first()
+    news = await db.get(News, news_id)
     if not news:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -107,70 +103,66 @@ async def upload_news_image(
     file_path = await save_uploaded_file(file, "news", ["image"])
     
     # Remove old image if exists
-    if news.image_path and os.path.exists(news.image_path):
-        os.remove(news.image_path)
+    if news.image_path:
+        await delete_file_async(news.image_path)
     
     news.image_path = file_path
-    db.commit()
+    await db.commit()
+    await cache.invalidate("news")
     
     return {"message": "Image uploaded successfully", "file_path": file_path}
 
 @router.delete("/{news_id}")
 async def delete_news(
     news_id: int,
+    background_tasks: BackgroundTasks,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete news (moderator/admin only)"""
-    news = db.query(News).filter(News.id == news_id).first()
+    news = await db.get(News, news_id)
     if not news:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="News not found"
         )
     
-    # Remove files
-    if news.image_path and os.path.exists(news.image_path):
-        os.remove(news.image_path)
-    if news.video_path and os.path.exists(news.video_path):
-        os.remove(news.video_path)
+    await db.delete(news)
+    await db.commit()
+    await cache.invalidate("news")
     
-    db.delete(news)
-    db.commit()
+    # Remove files once the row is gone, after the response is sent
+    background_tasks.add_task(delete_files, news.image_path, news.video_path)
     
     return {"message": "News deleted successfully"}
 
 # Announcements endpoints
-@router.get("/announcements/", response_model=List[AnnouncementSchema])
+@router.get("/announcements/", response_model=List[AnnouncementSchema], dependencies=[Depends(search_rate_limit)])
+@cache.cached("news", ttl=settings.cache_long_ttl, response_model=List[AnnouncementSchema])
 async def get_announcements(
-    request: Request,
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    after_id: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get announcements list with pagination and search"""
-    query = db.query(Announcement).filter(Announcement.is_active == True)
+    query = select(Announcement).where(Announcement.is_active == True)
     
     if search:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(Announcement.title_uz.contains(search) | Announcement.content_uz.contains(search))
-        elif language == 'ru':
-            query = query.filter(Announcement.title_ru.contains(search) | Announcement.content_ru.contains(search))
-        elif language == 'en':
-            query = query.filter(Announcement.title_en.contains(search) | Announcement.content_en.contains(search))
-    
-    announcements = query.order_by(Announcement.published_date.desc()).offset(skip).limit(limit).all()
-    return announcements
+        query = query.where(fulltext_search_filter(search, Announcement))
+    
+    announcements = await db.scalars(paginate_newest_first(query, Announcement, "published_date", skip, limit, after_id))
+    return announcements.all()
 
 @router.get("/announcements/{announcement_id}", response_model=AnnouncementSchema)
-async def get_announcement(announcement_id: int, db: Session = Depends(get_db)):
+@cache.cached("news", ttl=settings.cache_long_ttl, response_model=AnnouncementSchema)
+async def get_announcement(announcement_id: int, db: AsyncSession = Depends(get_db)):
     """Get single announcement"""
-    announcement = db.query(Announcement).filter(
+    announcement = await db.scalar(select(Announcement).where(
         Announcement.id == announcement_id, 
         Announcement.is_active == True
-    ).first()
+    ))
     if not announcement:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -182,13 +174,14 @@ async def get_announcement(announcement_id: int, db: Session = Depends(get_db)):
 async def create_announcement(
     announcement_data: AnnouncementCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new announcement (moderator/admin only)"""
-    db_announcement = Announcement(**announcement_data.dict())
+    db_announcement = Announcement(**announcement_data.model_dump())
     db.add(db_announcement)
-    db.commit()
-    db.refresh(db_announcement)
+    await db.commit()
+    await db.refresh(db_announcement)
+    await cache.invalidate("news")
     return db_announcement
 
 @router.put("/announcements/{announcement_id}", response_model=AnnouncementSchema)
@@ -196,45 +189,40 @@ async def update_announcement(
     announcement_id: int,
     announcement_update: AnnouncementUpdate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update announcement (moderator/admin only)"""
-    announcement = db.query(Announcement).filter(Announcement.id == announcement_id).first()
+    announcement = await update_by_id(db, Announcement, announcement_id, announcement_update.model_dump(exclude_unset=True))
     if not announcement:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Announcement not found"
         )
     
-    update_data = announcement_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(announcement, field, value)
-    
-    db.commit()
-    db.refresh(announcement)
+    await db.commit()
+    await cache.invalidate("news")
     return announcement
 
 @router.delete("/announcements/{announcement_id}")
 async def delete_announcement(
     announcement_id: int,
+    background_tasks: BackgroundTasks,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete announcement (moderator/admin only)"""
-    announcement = db.query(Announcement).filter(Announcement.id == announcement_id).first()
+    announcement = await db.get(Announcement, announcement_id)
     if not announcement:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Announcement not found"
         )
     
-    # Remove files
-    if announcement.image_path and os.path.exists(announcement.image_path):
-        os.remove(announcement.image_path)
-    if announcement.video_path and os.path.exists(announcement.video_path):
-        os.remove(announcement.video_path)
+    await db.delete(announcement)
+    await db.commit()
+    await cache.invalidate("news")
     
-    db.delete(announcement)
-    db.commit()
+    # Remove files once the row is gone, after the response is sent
+    background_tasks.add_task(delete_files, announcement.image_path, announcement.video_path)
     
     return {"message": "Announcement deleted successfully"}
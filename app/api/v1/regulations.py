@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Query
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.db.database import get_db
 from app.db.models.regulations import Law, UrbanNorm, Standard, BuildingRegulation, SmetaResourceNorm, Reference
@@ -12,39 +13,46 @@ from app.schemas.regulations import (
     Reference as ReferenceSchema, ReferenceCreate, ReferenceUpdate
 )
 from app.api.v1.auth import get_moderator_user
-from app.services.utils import save_uploaded_file
-import os
+from app.services.utils import save_uploaded_file, delete_file_async, localized_columns, substring_search_filter, paginate_newest_first, insert_row, update_by_id, delete_by_id
+from app.core.cache import cache
+from app.core.rate_limit import search_rate_limit
+from app.core.config import settings
 
 router = APIRouter()
 
+LAW_SEARCH_COLUMNS = localized_columns(Law, "name", "authority")
+URBAN_NORM_SEARCH_COLUMNS = localized_columns(UrbanNorm, "name")
+STANDARD_SEARCH_COLUMNS = localized_columns(Standard, "name")
+BUILDING_REGULATION_SEARCH_COLUMNS = localized_columns(BuildingRegulation, "name")
+SMETA_RESOURCE_NORM_SEARCH_COLUMNS = localized_columns(SmetaResourceNorm, "shnq_name")
+REFERENCE_SEARCH_COLUMNS = localized_columns(Reference, "name")
+
 # Laws endpoints
-@router.get("/laws", response_model=List[LawSchema])
+@router.get("/laws", response_model=List[LawSchema], dependencies=[Depends(search_rate_limit)])
+@cache.cached("regulations", ttl=settings.cache_long_ttl, response_model=List[LawSchema])
 async def get_laws(
     request: Request,
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    after_id: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get laws list with pagination and search"""
-    query = db.query(Law).filter(Law.is_active == True)
+    query = select(Law).where(Law.is_active == True)
     
     if search:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(Law.name_uz.contains(search) | Law.authority_uz.contains(search))
-        elif language == 'ru':
-            query = query.filter(Law.name_ru.contains(search) | Law.authority_ru.contains(search))
-        elif language == 'en':
-            query = query.filter(Law.name_en.contains(search) | Law.authority_en.contains(search))
+        columns = LAW_SEARCH_COLUMNS.get(getattr(request.state, 'language', 'uz'), ())
+        query = query.where(substring_search_filter(search, *columns))
     
-    laws = query.order_by(Law.adoption_date.desc()).offset(skip).limit(limit).all()
-    return laws
+    laws = await db.scalars(paginate_newest_first(query, Law, "adoption_date", skip, limit, after_id))
+    return laws.all()
 
 @router.get("/laws/{law_id}", response_model=LawSchema)
-async def get_law(law_id: int, db: Session = Depends(get_db)):
+@cache.cached("regulations", ttl=settings.cache_long_ttl, response_model=LawSchema)
+async def get_law(law_id: int, db: AsyncSession = Depends(get_db)):
     """Get single law"""
-    law = db.query(Law).filter(Law.id == law_id, Law.is_active == True).first()
+    law = await db.scalar(select(Law).where(Law.id == law_id, Law.is_active == True))
     if not law:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -56,13 +64,12 @@ async def get_law(law_id: int, db: Session = Depends(get_db)):
 async def create_law(
     law_data: LawCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new law (moderator/admin only)"""
-    db_law = Law(**law_data.dict())
-    db.add(db_law)
-    db.commit()
-    db.refresh(db_law)
+    db_law = await insert_row(db, Law, law_data.model_dump())
+    await db.commit()
+    await cache.invalidate("regulations")
     return db_law
 
 @router.put("/laws/{law_id}", response_model=LawSchema)
@@ -70,114 +77,101 @@ async def update_law(
     law_id: int,
     law_update: LawUpdate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update law (moderator/admin only)"""
-    law = db.query(Law).filter(Law.id == law_id).first()
+    law = await update_by_id(db, Law, law_id, law_update.model_dump(exclude_unset=True))
     if not law:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Law not found"
         )
     
-    update_data = law_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(law, field, value)
-    
-    db.commit()
-    db.refresh(law)
+    await db.commit()
+    await cache.invalidate("regulations")
     return law
 
 @router.delete("/laws/{law_id}")
 async def delete_law(
     law_id: int,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete law (moderator/admin only)"""
-    law = db.query(Law).filter(Law.id == law_id).first()
-    if not law:
+    if not await delete_by_id(db, Law, law_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Law not found"
         )
     
-    db.delete(law)
-    db.commit()
+    await db.commit()
+    await cache.invalidate("regulations")
     return {"message": "Law deleted successfully"}
 
 # Urban Norms endpoints
-@router.get("/urban-norms", response_model=List[UrbanNormSchema])
+@router.get("/urban-norms", response_model=List[UrbanNormSchema], dependencies=[Depends(search_rate_limit)])
+@cache.cached("regulations", ttl=settings.cache_long_ttl, response_model=List[UrbanNormSchema])
 async def get_urban_norms(
     request: Request,
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    after_id: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get urban norms list with pagination and search"""
-    query = db.query(UrbanNorm).filter(UrbanNorm.is_active == True)
+    query = select(UrbanNorm).where(UrbanNorm.is_active == True)
     
     if search:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(UrbanNorm.name_uz.contains(search) | UrbanNorm.document_code.contains(search))
-        elif language == 'ru':
-            query = query.filter(UrbanNorm.name_ru.contains(search) | UrbanNorm.document_code.contains(search))
-        elif language == 'en':
-            query = query.filter(UrbanNorm.name_en.contains(search) | UrbanNorm.document_code.contains(search))
+        columns = URBAN_NORM_SEARCH_COLUMNS.get(getattr(request.state, 'language', 'uz'), ())
+        query = query.where(substring_search_filter(search, *columns, UrbanNorm.document_code))
     
-    norms = query.order_by(UrbanNorm.created_at.desc()).offset(skip).limit(limit).all()
-    return norms
+    norms = await db.scalars(paginate_newest_first(query, UrbanNorm, "created_at", skip, limit, after_id))
+    return norms.all()
 
 @router.post("/urban-norms", response_model=UrbanNormSchema)
 async def create_urban_norm(
     norm_data: UrbanNormCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new urban norm (moderator/admin only)"""
-    db_norm = UrbanNorm(**norm_data.dict())
-    db.add(db_norm)
-    db.commit()
-    db.refresh(db_norm)
+    db_norm = await insert_row(db, UrbanNorm, norm_data.model_dump())
+    await db.commit()
+    await cache.invalidate("regulations")
     return db_norm
 
 # Standards endpoints
-@router.get("/standards", response_model=List[StandardSchema])
+@router.get("/standards", response_model=List[StandardSchema], dependencies=[Depends(search_rate_limit)])
+@cache.cached("regulations", ttl=settings.cache_long_ttl, response_model=List[StandardSchema])
 async def get_standards(
     request: Request,
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    after_id: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get standards list with pagination and search"""
-    query = db.query(Standard).filter(Standard.is_active == True)
+    query = select(Standard).where(Standard.is_active == True)
     
     if search:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(Standard.name_uz.contains(search))
-        elif language == 'ru':
-            query = query.filter(Standard.name_ru.contains(search))
-        elif language == 'en':
-            query = query.filter(Standard.name_en.contains(search))
+        columns = STANDARD_SEARCH_COLUMNS.get(getattr(request.state, 'language', 'uz'), ())
+        query = query.where(substring_search_filter(search, *columns))
     
-    standards = query.order_by(Standard.created_at.desc()).offset(skip).limit(limit).all()
-    return standards
+    standards = await db.scalars(paginate_newest_first(query, Standard, "created_at", skip, limit, after_id))
+    return standards.all()
 
 @router.post("/standards", response_model=StandardSchema)
 async def create_standard(
     standard_data: StandardCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new standard (moderator/admin only)"""
-    db_standard = Standard(**standard_data.dict())
-    db.add(db_standard)
-    db.commit()
-    db.refresh(db_standard)
+    db_standard = await insert_row(db, Standard, standard_data.model_dump())
+    await db.commit()
+    await cache.invalidate("regulations")
     return db_standard
 
 @router.post("/standards/{standard_id}/upload-pdf")
@@ -185,10 +179,11 @@ async def upload_standard_pdf(
     standard_id: int,
     file: UploadFile = File(...),
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload PDF for standard"""
-    standard = db.query(Standard).filter(Standard.id == standard_id).first()
+    # Only the current file path is needed, not the whole row
+    standard = (await db.execute(select(Standard.pdf_path).where(Standard.id == standard_id))).first()
     if not standard:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -199,150 +194,112 @@ async def upload_standard_pdf(
     file_path = await save_uploaded_file(file, "standards", ["document"])
     
     # Remove old PDF if exists
-    if standard.pdf_path and os.path.exists(standard.pdf_path):
-        os.remove(standard.pdf_path)
+    if standard.pdf_path:
+        await delete_file_async(standard.pdf_path)
     
-    standard.pdf_path = file_path
-    db.commit()
+    await db.execute(update(Standard).where(Standard.id == standard_id).values(pdf_path=file_path))
+    await db.commit()
+    await cache.invalidate("regulations")
     
     return {"message": "PDF uploaded successfully", "file_path": file_path}
 
 # Building Regulations endpoints
-@router.get("/building-regulations", response_model=List[BuildingRegulationSchema])
+@router.get("/building-regulations", response_model=List[BuildingRegulationSchema], dependencies=[Depends(search_rate_limit)])
+@cache.cached("regulations", ttl=settings.cache_long_ttl, response_model=List[BuildingRegulationSchema])
 async def get_building_regulations(
     request: Request,
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    after_id: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get building regulations list with pagination and search"""
-    query = db.query(BuildingRegulation).filter(BuildingRegulation.is_active == True)
+    query = select(BuildingRegulation).where(BuildingRegulation.is_active == True)
     
     if search:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(
-                BuildingRegulation.name_uz.contains(search) | 
-                BuildingRegulation.document_number.contains(search)
-            )
-        elif language == 'ru':
-            query = query.filter(
-                BuildingRegulation.name_ru.contains(search) | 
-                BuildingRegulation.document_number.contains(search)
-            )
-        elif language == 'en':
-            query = query.filter(
-                BuildingRegulation.name_en.contains(search) | 
-                BuildingRegulation.document_number.contains(search)
-            )
+        columns = BUILDING_REGULATION_SEARCH_COLUMNS.get(getattr(request.state, 'language', 'uz'), ())
+        query = query.where(substring_search_filter(search, *columns, BuildingRegulation.document_number))
     
-    regulations = query.order_by(BuildingRegulation.created_at.desc()).offset(skip).limit(limit).all()
-    return regulations
+    regulations = await db.scalars(paginate_newest_first(query, BuildingRegulation, "created_at", skip, limit, after_id))
+    return regulations.all()
 
 @router.post("/building-regulations", response_model=BuildingRegulationSchema)
 async def create_building_regulation(
     regulation_data: BuildingRegulationCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new building regulation (moderator/admin only)"""
-    db_regulation = BuildingRegulation(**regulation_data.dict())
-    db.add(db_regulation)
-    db.commit()
-    db.refresh(db_regulation)
+    db_regulation = await insert_row(db, BuildingRegulation, regulation_data.model_dump())
+    await db.commit()
+    await cache.invalidate("regulations")
     return db_regulation
 
 # Smeta Resource Norms endpoints
-@router.get("/smeta-resource-norms", response_model=List[SmetaResourceNormSchema])
+@router.get("/smeta-resource-norms", response_model=List[SmetaResourceNormSchema], dependencies=[Depends(search_rate_limit)])
+@cache.cached("regulations", ttl=settings.cache_long_ttl, response_model=List[SmetaResourceNormSchema])
 async def get_smeta_resource_norms(
     request: Request,
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    after_id: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get smeta resource norms list with pagination and search"""
-    query = db.query(SmetaResourceNorm).filter(SmetaResourceNorm.is_active == True)
+    query = select(SmetaResourceNorm).where(SmetaResourceNorm.is_active == True)
     
     if search:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(
-                SmetaResourceNorm.shnq_name_uz.contains(search) | 
-                SmetaResourceNorm.document_number.contains(search)
-            )
-        elif language == 'ru':
-            query = query.filter(
-                SmetaResourceNorm.shnq_name_ru.contains(search) | 
-                SmetaResourceNorm.document_number.contains(search)
-            )
-        elif language == 'en':
-            query = query.filter(
-                SmetaResourceNorm.shnq_name_en.contains(search) | 
-                SmetaResourceNorm.document_number.contains(search)
-            )
+        columns = SMETA_RESOURCE_NORM_SEARCH_COLUMNS.get(getattr(request.state, 'language', 'uz'), ())
+        query = query.where(substring_search_filter(search, *columns, SmetaResourceNorm.document_number))
     
-    norms = query.order_by(SmetaResourceNorm.created_at.desc()).offset(skip).limit(limit).all()
-    return norms
+    norms = await db.scalars(paginate_newest_first(query, SmetaResourceNorm, "created_at", skip, limit, after_id))
+    return norms.all()
 
 @router.post("/smeta-resource-norms", response_model=SmetaResourceNormSchema)
 async def create_smeta_resource_norm(
     norm_data: SmetaResourceNormCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new smeta resource norm (moderator/admin only)"""
-    db_norm = SmetaResourceNorm(**norm_data.dict())
-    db.add(db_norm)
-    db.commit()
-    db.refresh(db_norm)
+    db_norm = await insert_row(db, SmetaResourceNorm, norm_data.model_dump())
+    await db.commit()
+    await cache.invalidate("regulations")
     return db_norm
 
 # References endpoints
-@router.get("/references", response_model=List[ReferenceSchema])
+@router.get("/references", response_model=List[ReferenceSchema], dependencies=[Depends(search_rate_limit)])
+@cache.cached("regulations", ttl=settings.cache_long_ttl, response_model=List[ReferenceSchema])
 async def get_references(
     request: Request,
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    after_id: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get references list with pagination and search"""
-    query = db.query(Reference).filter(Reference.is_active == True)
+    query = select(Reference).where(Reference.is_active == True)
     
     if search:
-        language = getattr(request.state, 'language', 'uz')
-        if language == 'uz':
-            query = query.filter(
-                Reference.name_uz.contains(search) | 
-                Reference.reference_number.contains(search)
-            )
-        elif language == 'ru':
-            query = query.filter(
-                Reference.name_ru.contains(search) | 
-                Reference.reference_number.contains(search)
-            )
-        elif language == 'en':
-            query = query.filter(
-                Reference.name_en.contains(search) | 
-                Reference.reference_number.contains(search)
-            )
+        columns = REFERENCE_SEARCH_COLUMNS.get(getattr(request.state, 'language', 'uz'), ())
+        query = query.where(substring_search_filter(search, *columns, Reference.reference_number))
     
-    references = query.order_by(Reference.created_at.desc()).offset(skip).limit(limit).all()
-    return references
+    references = await db.scalars(paginate_newest_first(query, Reference, "created_at", skip, limit, after_id))
+    return references.all()
 
 @router.post("/references", response_model=ReferenceSchema)
 async def create_reference(
     reference_data: ReferenceCreate,
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new reference (moderator/admin only)"""
-    db_reference = Reference(**reference_data.dict())
-    db.add(db_reference)
-    db.commit()
-    db.refresh(db_reference)
+    db_reference = await insert_row(db, Reference, reference_data.model_dump())
+    await db.commit()
+    await cache.invalidate("regulations")
     return db_reference
 
 @router.post("/references/{reference_id}/upload-pdf")
@@ -350,10 +307,11 @@ async def upload_reference_pdf(
     reference_id: int,
     file: UploadFile = File(...),
     current_user = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload PDF for reference"""
-    reference = db.query(Reference).filter(Reference.id == reference_id).first()
+    # Only the current file path is needed, not the whole row
+    reference = (await db.execute(select(Reference.pdf_path).where(Reference.id == reference_id))).first()
     if not reference:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -364,10 +322,11 @@ async def upload_reference_pdf(
     file_path = await save_uploaded_file(file, "references", ["document"])
     
     # Remove old PDF if exists
-    if reference.pdf_path and os.path.exists(reference.pdf_path):
-        os.remove(reference.pdf_path)
+    if reference.pdf_path:
+        await delete_file_async(reference.pdf_path)
     
-    reference.pdf_path = file_path
-    db.commit()
+    await db.execute(update(Reference).where(Reference.id == reference_id).values(pdf_path=file_path))
+    await db.commit()
+    await cache.invalidate("regulations")
     
     return {"message": "PDF uploaded successfully", "file_path": file_path}
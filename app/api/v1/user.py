@@ -1,14 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from contextlib import asynccontextmanager
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.db.database import get_db
 from app.db.models.user import User
 from app.schemas.user import User as UserSchema, UserUpdate, ModeratorCreate
-from app.api.v1.auth import get_current_user, get_admin_user, get_moderator_user
+from app.api.v1.auth import get_current_user, get_admin_user, get_moderator_user, invalidate_principal
+from app.core.config import settings
 from app.core.security import get_password_hash
+from app.services.utils import insert_row, update_by_id, delete_by_id
 
 router = APIRouter()
 
+# Unique index behind each user field; SQLite reports the constrained column instead
+DUPLICATE_USER_FIELDS = {
+    "ix_users_username": "Username",
+    "ix_users_email": "Email",
+    "users.username": "Username",
+    "users.email": "Email",
+}
+
+def duplicate_user_field(error: IntegrityError) -> Optional[str]:
+    """Field whose unique index rejected the write, None for any other integrity error"""
+    orig = error.orig
+    # psycopg2 exposes diagnostics, asyncpg errors are chained as the cause
+    constraint = (
+        getattr(getattr(orig, "diag", None), "constraint_name", None)
+        or getattr(orig.__cause__, "constraint_name", None)
+    )
+    if constraint is None:
+        message = str(orig)
+        if message.startswith("UNIQUE constraint failed: "):
+            constraint = message.removeprefix("UNIQUE constraint failed: ")
+    return DUPLICATE_USER_FIELDS.get(constraint)
+
+@asynccontextmanager
+async def reject_duplicate_user(db: AsyncSession, conflict_verb: str):
+    """Report a duplicate username or email raised by the wrapped writes as 400
+    
+    The unique indexes do the check, so no lookup runs before the write.
+    Other integrity errors are re-raised.
+    """
+    try:
+        yield
+    except IntegrityError as e:
+        await db.rollback()
+        field = duplicate_user_field(e)
+        if field is None:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{field} already {conflict_verb}"
+        )
+
 @router.get("/profile", response_model=UserSchema)
 async def get_profile(current_user: User = Depends(get_current_user)):
     """Get current user profile"""
@@ -18,57 +65,37 @@ async def get_profile(current_user: User = Depends(get_current_user)):
 async def update_profile(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update current user profile"""
-    update_data = user_update.dict(exclude_unset=True)
-    
-    # Check if username is being changed and if it's unique
-    if "username" in update_data and update_data["username"] != current_user.username:
-        existing_user = db.query(User).filter(User.username == update_data["username"]).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already taken"
-            )
-    
-    # Check if email is being changed and if it's unique
-    if "email" in update_data and update_data["email"] != current_user.email:
-        existing_user = db.query(User).filter(User.email == update_data["email"]).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already taken"
-            )
-    
-    # Update user fields
-    for field, value in update_data.items():
-        if field != "is_active":  # Users can't change their active status
-            setattr(current_user, field, value)
+    update_data = user_update.model_dump(exclude_unset=True)
+    update_data.pop("is_active", None)  # Users can't change their active status
     
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    async with reject_duplicate_user(db, "taken"):
+        user = await update_by_id(db, User, current_user.id, update_data)
+        await db.commit()
+    await invalidate_principal(current_user.id)
+    return user
 
 @router.get("/list", response_model=List[UserSchema])
 async def list_users(
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
     current_user: User = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List all users (moderator/admin only)"""
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    users = await db.scalars(select(User).offset(skip).limit(limit))
+    return users.all()
 
 @router.get("/{user_id}", response_model=UserSchema)
 async def get_user(
     user_id: int,
     current_user: User = Depends(get_moderator_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user by ID (moderator/admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -81,78 +108,40 @@ async def update_user(
     user_id: int,
     user_update: UserUpdate,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user by ID (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    async with reject_duplicate_user(db, "taken"):
+        user = await update_by_id(db, User, user_id, user_update.model_dump(exclude_unset=True))
+        await db.commit()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    update_data = user_update.dict(exclude_unset=True)
-    
-    # Check for unique constraints
-    if "username" in update_data and update_data["username"] != user.username:
-        existing_user = db.query(User).filter(User.username == update_data["username"]).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already taken"
-            )
-    
-    if "email" in update_data and update_data["email"] != user.email:
-        existing_user = db.query(User).filter(User.email == update_data["email"]).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already taken"
-            )
-    
-    # Update user fields
-    for field, value in update_data.items():
-        setattr(user, field, value)
-    
-    db.commit()
-    db.refresh(user)
+    await invalidate_principal(user_id)
     return user
 
 @router.post("/create-moderator", response_model=UserSchema)
 async def create_moderator(
     moderator_data: ModeratorCreate,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new moderator (admin only)"""
-    # Check if username already exists
-    if db.query(User).filter(User.username == moderator_data.username).first():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-    
-    # Check if email already exists
-    if db.query(User).filter(User.email == moderator_data.email).first():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
     # Create new moderator
-    hashed_password = get_password_hash(moderator_data.password)
-    db_user = User(
-        username=moderator_data.username,
-        email=moderator_data.email,
-        full_name=moderator_data.full_name,
-        phone=moderator_data.phone,
-        hashed_password=hashed_password,
-        is_moderator=True
-    )
-    
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    hashed_password = await run_in_threadpool(get_password_hash, moderator_data.password)
+    async with reject_duplicate_user(db, "registered"):
+        db_user = await insert_row(db, User, {
+            "username": moderator_data.username,
+            "email": moderator_data.email,
+            "full_name": moderator_data.full_name,
+            "phone": moderator_data.phone,
+            "hashed_password": hashed_password,
+            "is_moderator": True
+        })
+        await db.commit()
     
     return db_user
 
@@ -160,24 +149,23 @@ async def create_moderator(
 async def delete_user(
     user_id: int,
     current_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete user by ID (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Prevent admin from deleting themselves
-    if user.id == current_user.id:
+    if user_id == current_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete your own account"
         )
     
-    db.delete(user)
-    db.commit()
+    if not await delete_by_id(db, User, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    await db.commit()
+    await invalidate_principal(user_id)
     
     return {"message": "User deleted successfully"}
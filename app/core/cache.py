@@ -0,0 +1,285 @@
+import functools
+import hashlib
+import inspect
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple, get_args, get_origin
+
+import orjson
+from cachetools import TLRUCache
+from fastapi import Request, Response, params
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Entries are stored as "<headers JSON>\n<body>"; bump the version when that changes
+CACHE_PREFIX = "tmsiti:cache:v2:"
+# Stale copies live under their own prefix so invalidation keeps them around
+STALE_PREFIX = "tmsiti:stale:v2:"
+
+
+def _pack(headers: Dict[str, str], body: bytes) -> bytes:
+    # Compact JSON never contains a raw newline, so the first one ends the headers
+    return orjson.dumps(headers) + b"\n" + body
+
+
+def _unpack(value: bytes) -> Tuple[Dict[str, str], bytes]:
+    headers, _, body = value.partition(b"\n")
+    return orjson.loads(headers), body
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Weak and strong validators compare the same for GET
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _json_response(request: Request, headers: Dict[str, str], body: bytes, cache_status: str) -> Response:
+    headers = {**headers, "X-Cache": cache_status}
+    etag = headers.get("ETag")
+    if etag and _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _construct(model, obj):
+    # Rows were validated on the way in, so build the schema without re-validating
+    if isinstance(obj, (dict, BaseModel)):
+        return model.model_validate(obj, from_attributes=True)
+    return model.model_construct(**{name: getattr(obj, name) for name in model.model_fields})
+
+
+def _trusted_loader(response_model: Any) -> Optional[Callable[[Any], Any]]:
+    """Build schema instances from ORM rows for ``Schema`` and ``List[Schema]`` models"""
+    if isinstance(response_model, type) and issubclass(response_model, BaseModel):
+        return lambda result: _construct(response_model, result)
+    args = get_args(response_model)
+    if (
+        get_origin(response_model) is list
+        and len(args) == 1
+        and isinstance(args[0], type)
+        and issubclass(args[0], BaseModel)
+    ):
+        return lambda result: [_construct(args[0], row) for row in result]
+    return None
+
+
+class MemoryBackend:
+    """In-process cache backend, used when no Redis URL is configured
+    
+    Holds at most ``max_bytes`` of values; expired entries are dropped on
+    every write and the least recently used ones make room for new values.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self._store: TLRUCache = TLRUCache(
+            maxsize=max_bytes,
+            ttu=lambda key, item, now: now + item[1],
+            getsizeof=lambda item: len(item[0])
+        )
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._store.get(key)
+        return item[0] if item is not None else None
+    
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        if len(value) > self._store.maxsize:
+            return
+        self._store[key] = (value, ttl)
+    
+    async def add(self, key: str, value: bytes, ttl: int) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+    
+    async def delete(self, key: str) -> None:
+        self._store.pop(key, None)
+    
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in list(self._store.keys()) if key.startswith(prefix)]:
+            self._store.pop(key, None)
+
+
+class RedisBackend:
+    """Redis cache backend shared by all workers"""
+    
+    def __init__(self, url: str):
+        import redis.asyncio as aioredis
+        
+        self._client = aioredis.from_url(url)
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(key)
+    
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self._client.set(key, value, ex=ttl)
+    
+    async def add(self, key: str, value: bytes, ttl: int) -> bool:
+        return bool(await self._client.set(key, value, ex=ttl, nx=True))
+    
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+    
+    async def delete_prefix(self, prefix: str) -> None:
+        keys = [key async for key in self._client.scan_iter(match=f"{prefix}*")]
+        if keys:
+            await self._client.delete(*keys)
+
+
+class ResponseCache:
+    """Caches serialized JSON responses of read-only endpoints.
+    
+    Cache errors never fail a request: a broken backend only means the
+    endpoint runs as if nothing was cached.
+    """
+    
+    def __init__(self, backend):
+        self.backend = backend
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.backend.get(key)
+        except Exception:
+            logger.exception("Cache read failed for %s", key)
+            return None
+    
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        try:
+            await self.backend.set(key, value, ttl)
+        except Exception:
+            logger.exception("Cache write failed for %s", key)
+    
+    async def claim(self, key: str, ttl: int) -> bool:
+        """Take a lease on ``key`` for ``ttl`` seconds, False if another worker holds it
+        
+        A broken backend grants the lease, so the guarded work still runs.
+        """
+        try:
+            return await self.backend.add(key, b"1", ttl)
+        except Exception:
+            logger.exception("Cache claim failed for %s", key)
+            return True
+    
+    async def delete(self, key: str) -> None:
+        try:
+            await self.backend.delete(key)
+        except Exception:
+            logger.exception("Cache delete failed for %s", key)
+    
+    async def invalidate(self, namespace: str) -> None:
+        """Drop every cached response of the given namespace"""
+        try:
+            await self.backend.delete_prefix(f"{CACHE_PREFIX}{namespace}:")
+        except Exception:
+            logger.exception("Cache invalidation failed for %s", namespace)
+    
+    @staticmethod
+    def build_key(namespace: str, request: Request, values: Dict[str, Any]) -> str:
+        # Built from the endpoint's validated parameters, so undeclared query
+        # params cannot mint new keys and equivalent values share one entry
+        query = "&".join(f"{name}={value}" for name, value in values.items())
+        language = getattr(request.state, "language", settings.default_language)
+        return f"{namespace}:{request.url.path}?{query}:{language}"
+    
+    def cached(self, namespace: str, ttl: Optional[int] = None, response_model: Any = None):
+        """Cache the JSON body of a GET endpoint.
+        
+        Args:
+            namespace: Group of keys dropped together by ``invalidate``
+            ttl: Lifetime in seconds, defaults to ``settings.cache_default_ttl``
+            response_model: Schema used to serialize the endpoint result
+        
+        Dependencies (authentication included) still run on every request;
+        only the endpoint body is skipped on a hit. Headers the endpoint sets
+        on its ``Response`` parameter are cached with the body. Responses carry
+        an ETag of the body, and a matching ``If-None-Match`` gets a 304. If the
+        database fails, the last known response is served for up to
+        ``settings.cache_stale_ttl``.
+        """
+        ttl = ttl or settings.cache_default_ttl
+        adapter = TypeAdapter(response_model) if response_model is not None else None
+        loader = _trusted_loader(response_model)
+        
+        def decorator(func: Callable):
+            signature = inspect.signature(func)
+            request_param = next(
+                (name for name, param in signature.parameters.items() if param.annotation is Request),
+                None
+            )
+            response_param = next(
+                (name for name, param in signature.parameters.items() if param.annotation is Response),
+                None
+            )
+            parameters = list(signature.parameters.values())
+            key_params = [
+                name for name, param in signature.parameters.items()
+                if param.annotation not in (Request, Response) and not isinstance(param.default, params.Depends)
+            ]
+            if request_param is None:
+                request_param = "_cache_request"
+                parameters.append(
+                    inspect.Parameter(request_param, inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+                )
+            
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                request: Request = kwargs[request_param]
+                if request_param == "_cache_request":
+                    kwargs.pop(request_param)
+                
+                key = self.build_key(namespace, request, {name: kwargs[name] for name in key_params})
+                cached_value = await self.get(CACHE_PREFIX + key)
+                if cached_value is not None:
+                    headers, body = _unpack(cached_value)
+                    return _json_response(request, headers, body, "HIT")
+                
+                try:
+                    result = await func(*args, **kwargs)
+                except DBAPIError:
+                    cached_value = await self.get(STALE_PREFIX + key)
+                    if cached_value is None:
+                        raise
+                    logger.warning("Database unavailable, serving stale response for %s", key)
+                    headers, body = _unpack(cached_value)
+                    return _json_response(request, headers, body, "STALE")
+                
+                if isinstance(result, Response):
+                    return result
+                
+                if loader is not None:
+                    body = adapter.dump_json(loader(result))
+                elif adapter is not None:
+                    body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+                else:
+                    body = orjson.dumps(jsonable_encoder(result))
+                
+                headers = dict(kwargs[response_param].headers) if response_param else {}
+                headers["ETag"] = _etag(body)
+                cached_value = _pack(headers, body)
+                await self.set(CACHE_PREFIX + key, cached_value, ttl)
+                await self.set(STALE_PREFIX + key, cached_value, settings.cache_stale_ttl)
+                return _json_response(request, headers, body, "MISS")
+            
+            wrapper.__signature__ = signature.replace(parameters=parameters)
+            return wrapper
+        
+        return decorator
+
+
+def _create_backend():
+    if settings.redis_url:
+        return RedisBackend(settings.redis_url)
+    return MemoryBackend(settings.cache_memory_max_bytes)
+
+
+cache = ResponseCache(_create_backend())
@@ -1,30 +1,104 @@
-import os
-from typing import Optional, List
+from functools import lru_cache
+from typing import Optional, Tuple
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./tmsiti.db"
+    # Connection pool (ignored for SQLite); keep pool_size + max_overflow
+    # times the number of workers below the server's max_connections
+    db_pool_size: int = 25
+    db_max_overflow: int = 25
+    db_pool_recycle: int = 1800
+    db_pool_timeout: int = 30
+    db_pool_pre_ping: bool = True
+    db_pool_prewarm: int = 5
+    # Compiled SQL statements kept per engine; the default of 500 is too small
+    # for the per-language, per-filter variants of the list queries
+    db_query_cache_size: int = 1200
+    # Set when DATABASE_URL points at PgBouncer in transaction pooling mode,
+    # which cannot keep asyncpg's per-connection prepared statements
+    db_pgbouncer: bool = False
+    # Create missing tables when each worker starts; turn off once the schema
+    # is created at deploy time by create_tables.py
+    db_auto_create: bool = True
     
     # Security
-    secret_key: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
+    # Read from SECRET_KEY like every other field, .env included
+    secret_key: str = "your-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
+    # bcrypt cost factor for new hashes; each step doubles hashing time
+    bcrypt_rounds: int = 12
+    # In-process cache of verified tokens
+    token_cache_ttl: int = 60
+    token_cache_size: int = 100_000
     
     # File upload
     max_file_size: int = 10 * 1024 * 1024  # 10MB
-    allowed_image_extensions: List[str] = [".jpg", ".jpeg", ".png", ".gif", ".webp"]
-    allowed_document_extensions: List[str] = [".pdf", ".doc", ".docx"]
+    allowed_image_extensions: Tuple[str, ...] = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+    allowed_document_extensions: Tuple[str, ...] = (".pdf", ".doc", ".docx")
+    # "local" keeps uploads under static/uploads; "s3" moves them to an
+    # S3-compatible bucket (requires aioboto3) and stores the object key
+    storage_backend: str = "local"
+    s3_bucket: Optional[str] = None
+    s3_endpoint_url: Optional[str] = None
+    s3_region: Optional[str] = None
+    # Public or CDN base URL for object links, defaults to the bucket URL
+    s3_public_url: Optional[str] = None
+    
+    # Set to false when nginx or a CDN serves /static in front of the app
+    serve_static: bool = True
+    # Cache-Control max-age of static files; uploads get unique names
+    static_cache_max_age: int = 30 * 24 * 60 * 60
     
     # Pagination
     default_page_size: int = 20
     max_page_size: int = 100
     
     # Languages
-    supported_languages: List[str] = ["uz", "ru", "en"]
+    supported_languages: Tuple[str, ...] = ("uz", "ru", "en")
     default_language: str = "uz"
     
+    # CORS; comma-separated lists where "*" allows anything
+    cors_origins: str = "*"
+    cors_credentials: bool = True
+    cors_methods: str = "*"
+    cors_headers: str = "*"
+    # Seconds browsers may reuse a preflight response
+    cors_max_age: int = 24 * 60 * 60
+    
+    # Cache
+    redis_url: Optional[str] = None
+    cache_default_ttl: int = 30
+    cache_long_ttl: int = 300
+    cache_stale_ttl: int = 24 * 60 * 60
+    principal_cache_ttl: int = 60
+    # Upper bound on the bodies held by the in-process cache
+    cache_memory_max_bytes: int = 64 * 1024 * 1024
+    
+    # Per-IP limit on the public contact form
+    contact_rate_limit_times: int = 5
+    contact_rate_limit_seconds: int = 60
+    # Per-IP limit on searches of each public list endpoint
+    search_rate_limit_times: int = 30
+    search_rate_limit_seconds: int = 60
+    # Clients tracked by the in-process rate limit counter
+    rate_limit_max_keys: int = 100_000
+    
+    # Seconds between dashboard counter refreshes
+    dashboard_refresh_interval: int = 30
+    
+    # Debugging; reports per-request SQL statement counts when enabled
+    debug: bool = False
+    query_count_warning: int = 10
+    
     model_config = {"env_file": ".env", "extra": "ignore"}
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Settings parsed once per process, usable as a FastAPI dependency"""
+    return Settings()
+
+settings = get_settings()
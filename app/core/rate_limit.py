@@ -0,0 +1,100 @@
+import logging
+import time
+from typing import Tuple
+
+from cachetools import TLRUCache
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_PREFIX = "tmsiti:ratelimit:"
+
+
+class MemoryCounter:
+    """Fixed-window hit counter kept in process, used when no Redis URL is configured"""
+    
+    def __init__(self, max_keys: int):
+        # Each window expires on its own; the least recently seen clients
+        # are dropped first if more than max_keys are tracked
+        self._windows: TLRUCache = TLRUCache(maxsize=max_keys, ttu=lambda key, window, now: window[0])
+    
+    async def hit(self, key: str, window: int) -> Tuple[int, int]:
+        now = time.monotonic()
+        expires_at, hits = self._windows.get(key, (now + window, 0))
+        hits += 1
+        self._windows[key] = (expires_at, hits)
+        return hits, max(1, int(expires_at - now))
+
+
+class RedisCounter:
+    """Fixed-window hit counter in Redis, so the limit holds across workers"""
+    
+    def __init__(self, url: str):
+        import redis.asyncio as aioredis
+        
+        self._client = aioredis.from_url(url)
+    
+    async def hit(self, key: str, window: int) -> Tuple[int, int]:
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, window, nx=True)
+            pipe.ttl(key)
+            hits, _, ttl = await pipe.execute()
+        return hits, max(1, ttl)
+
+
+class RateLimiter:
+    """Dependency allowing ``times`` requests per client IP every ``seconds``.
+    
+    Add it to the route's ``dependencies`` so rejected requests never reach
+    the endpoint or open a database session. Counter failures let the request
+    through rather than failing it.
+    
+    Behind a reverse proxy the client IP comes from X-Forwarded-For, which
+    the server only honors from FORWARDED_ALLOW_IPS (see nginx.conf).
+    """
+    
+    def __init__(self, times: int, seconds: int):
+        self.times = times
+        self.seconds = seconds
+    
+    async def __call__(self, request: Request) -> None:
+        client = request.client.host if request.client else "unknown"
+        key = f"{RATE_LIMIT_PREFIX}{request.scope['path']}:{client}"
+        try:
+            hits, retry_after = await counter.hit(key, self.seconds)
+        except Exception:
+            logger.exception("Rate limit check failed for %s", key)
+            return
+        
+        if hits > self.times:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(retry_after)}
+            )
+
+
+class SearchRateLimiter(RateLimiter):
+    """RateLimiter that only counts requests carrying a ``search`` term"""
+    
+    async def __call__(self, request: Request) -> None:
+        if request.query_params.get("search"):
+            await super().__call__(request)
+
+
+def _create_counter():
+    if settings.redis_url:
+        return RedisCounter(settings.redis_url)
+    return MemoryCounter(settings.rate_limit_max_keys)
+
+
+counter = _create_counter()
+
+# Shared by the public list endpoints; plain listing stays unlimited
+search_rate_limit = SearchRateLimiter(
+    times=settings.search_rate_limit_times,
+    seconds=settings.search_rate_limit_seconds
+)
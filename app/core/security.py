@@ -1,11 +1,18 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Union, Any
+from cachetools import TTLCache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashing is CPU-bound; async callers run it through run_in_threadpool
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+
+# Verified token payloads keyed by token hash; expiry is still checked on every hit
+_decoded_tokens: TTLCache = TTLCache(maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl)
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
@@ -42,12 +49,18 @@ def verify_token(token: str) -> Optional[str]:
         return None
 
 def decode_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = _decoded_tokens.get(key)
+    if payload is not None and payload.get("exp", 0) > time.time():
+        return payload
+    
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    _decoded_tokens[key] = payload
+    return payload
@@ -1,19 +1,261 @@
-from sqlalchemy import create_engine
+import asyncio
+import logging
+import uuid
+from sqlalchemy import DDL, Index, create_engine, event, inspect, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def get_async_database_url(database_url: str) -> str:
+    """Return the database URL with the sync driver swapped for its async counterpart"""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for '{url.get_backend_name()}'")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+is_sqlite = make_url(settings.database_url).get_backend_name() == "sqlite"
+
+# SQLite keeps SQLAlchemy's default pooling
+pool_options = {} if is_sqlite else {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_recycle": settings.db_pool_recycle,
+    # Seconds to wait for a free connection before raising TimeoutError
+    "pool_timeout": settings.db_pool_timeout,
+    "pool_pre_ping": settings.db_pool_pre_ping,
+}
+
+# Sync engine, used by scripts such as create_tables.py
 engine = create_engine(
-    settings.database_url, 
-    connect_args={"check_same_thread": False}
+    settings.database_url,
+    connect_args={"check_same_thread": False} if is_sqlite else {},
+    query_cache_size=settings.db_query_cache_size,
+    **pool_options
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+# Trigram indexes used by substring search need the pg_trgm extension
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+def trigram_indexes(table_name: str, *columns: str) -> tuple:
+    """GIN trigram indexes so ILIKE '%term%' searches can use an index (PostgreSQL only)"""
+    return tuple(
+        Index(
+            f"ix_{table_name}_{column}_trgm",
+            column,
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql")
+        for column in columns
+    )
+
+# Rendered inline rather than as bind parameters so queries match the
+# immutable expression of the generated search column
+FTS_CONFIG = text("'simple'::regconfig")
+
+SEARCH_VECTOR_COLUMN = "search_vector"
+
+def search_vector_column(table, *columns) -> None:
+    """Stored tsvector over all language columns, with one GIN index (PostgreSQL only)
+
+    The column is generated by the database and not mapped on the model, so
+    SQLite schemas are unchanged; the source columns are kept in
+    ``table.info`` for the substring fallback used on other databases.
+    Both statements are idempotent, so ``add_search_vectors`` reruns them
+    to upgrade tables created before the column existed.
+    """
+    document = " || ' ' || ".join(f"coalesce({column.name}, '')" for column in columns)
+    table.info["search_columns"] = columns
+    table.info["search_ddl"] = (
+        DDL(
+            f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector({FTS_CONFIG.text}, {document})) STORED"
+        ),
+        DDL(
+            f"CREATE INDEX IF NOT EXISTS ix_{table.name}_{SEARCH_VECTOR_COLUMN} "
+            f"ON {table.name} USING GIN ({SEARCH_VECTOR_COLUMN})"
+        ),
+    )
+    for statement in table.info["search_ddl"]:
+        event.listen(table, "after_create", statement.execute_if(dialect="postgresql"))
+
+# Predicate of the partial indexes over active rows, per dialect
+ACTIVE_ROW_PREDICATES = {
+    "postgresql": "is_active",
+    "sqlite": "is_active = 1",
+}
+
+def active_index(table_name: str, *columns: str) -> Index:
+    """Partial index over active rows only, matching the ``is_active == True`` filters"""
+    return Index(
+        f"ix_{table_name}_active_{'_'.join(columns)}",
+        *columns,
+        postgresql_where=text(ACTIVE_ROW_PREDICATES["postgresql"]),
+        sqlite_where=text(ACTIVE_ROW_PREDICATES["sqlite"])
+    )
+
+def single_active_index(table_name: str) -> Index:
+    """Unique partial index allowing one active row, the conflict target of singleton upserts"""
+    return Index(
+        f"ix_{table_name}_single_active",
+        "is_active",
+        unique=True,
+        postgresql_where=text(ACTIVE_ROW_PREDICATES["postgresql"]),
+        sqlite_where=text(ACTIVE_ROW_PREDICATES["sqlite"]),
+        info={"single_active": True}
+    )
+
+def add_single_active_indexes(connection, deactivate_duplicates: bool = False) -> None:
+    """Add single-active indexes missing from existing tables, which create_all skips
+    
+    A table with several active rows cannot take the unique index, so it is
+    left without one unless ``deactivate_duplicates`` is set; create_tables.py
+    sets it to keep only the newest active row active.
+    """
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if not index.info.get("single_active") or inspector.has_index(table.name, index.name):
+                continue
+            active_ids = connection.scalars(
+                select(table.c.id).where(table.c.is_active == True).order_by(table.c.id.desc())
+            ).all()
+            duplicate_ids = active_ids[1:]
+            if duplicate_ids:
+                if not deactivate_duplicates:
+                    logger.warning(
+                        "%s has %d active rows, so %s was not created; run create_tables.py "
+                        "to deactivate all but the newest (id %s)",
+                        table.name, len(active_ids), index.name, active_ids[0]
+                    )
+                    continue
+                logger.warning(
+                    "Deactivating %s rows %s so only the newest (id %s) stays active",
+                    table.name, duplicate_ids, active_ids[0]
+                )
+                connection.execute(table.update().where(table.c.id.in_(duplicate_ids)).values(is_active=False))
+            index.create(connection)
+
+def add_search_vectors(connection) -> None:
+    """Add search vector columns and indexes missing from existing tables (PostgreSQL only)"""
+    if connection.dialect.name != "postgresql":
+        return
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if "search_ddl" not in table.info:
+            continue
+        has_column = any(column["name"] == SEARCH_VECTOR_COLUMN for column in inspector.get_columns(table.name))
+        if has_column and inspector.has_index(table.name, f"ix_{table.name}_{SEARCH_VECTOR_COLUMN}"):
+            continue
+        for statement in table.info["search_ddl"]:
+            connection.execute(statement)
+
+def detect_search_vectors(connection) -> None:
+    """Record which tables have their search vector column (PostgreSQL only)
+    
+    Search on tables that were not migrated falls back to substring matching
+    instead of failing on the missing column.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if "search_ddl" in table.info:
+            table.info["search_vector_ready"] = any(
+                column["name"] == SEARCH_VECTOR_COLUMN for column in inspector.get_columns(table.name)
+            )
+
+# Indexes that were removed from the models
+RETIRED_INDEXES = (
+    "ix_users_active_id",
+)
+
+def drop_retired_indexes(connection) -> None:
+    """Drop retired indexes that databases created earlier may still have"""
+    for index_name in RETIRED_INDEXES:
+        connection.execute(DDL(f"DROP INDEX IF EXISTS {index_name}"))
+
+def create_schema(connection, deactivate_duplicates: bool = False) -> None:
+    """Create missing tables and indexes on a sync connection
+    
+    Args:
+        connection: Sync connection to run the DDL on
+        deactivate_duplicates: Deactivate extra active singleton rows so
+            their unique index can be added; see add_single_active_indexes
+    """
+    Base.metadata.create_all(connection)
+    add_single_active_indexes(connection, deactivate_duplicates)
+    add_search_vectors(connection)
+    drop_retired_indexes(connection)
+
+def pgbouncer_connect_args() -> dict:
+    """asyncpg options for PgBouncer transaction pooling, where consecutive
+    statements may run on different server connections"""
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+    }
+
+async_engine = create_async_engine(
+    get_async_database_url(settings.database_url),
+    connect_args=pgbouncer_connect_args() if settings.db_pgbouncer and not is_sqlite else {},
+    query_cache_size=settings.db_query_cache_size,
+    **pool_options
+)
+
+# Per-connection SQLite tuning: WAL lets readers run alongside a writer and
+# only needs fsync at checkpoints, so NORMAL sync is still crash-safe
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "cache_size=-65536",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+)
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
+if is_sqlite:
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+async def prewarm_pool(connections: int) -> None:
+    """Open pooled connections up front so early requests skip the connection setup"""
+    if connections <= 0:
+        return
+    if is_sqlite:
+        # One connection is enough to start the driver thread and run the PRAGMAs
+        connections = 1
+    opened = await asyncio.gather(*[async_engine.connect() for _ in range(connections)])
+    for connection in opened:
+        await connection.close()
@@ -4,6 +4,7 @@ from app.db.models.regulations import Law, UrbanNorm, Standard, BuildingRegulati
 from app.db.models.institute import About, Management, Structure, StructuralDivision, Vacancy
 from app.db.models.activity import ManagementSystem, Laboratory
 from app.db.models.contact import Contact, AntiCorruption
+from app.db.models.dashboard import DashboardCounter
 
 __all__ = [
     "User",
@@ -23,5 +24,6 @@ __all__ = [
     "ManagementSystem",
     "Laboratory",
     "Contact",
-    "AntiCorruption"
+    "AntiCorruption",
+    "DashboardCounter"
 ]
@@ -1,9 +1,12 @@
 from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
 from sqlalchemy.sql import func
-from app.db.database import Base
+from app.db.database import Base, active_index
 
 class ManagementSystem(Base):
     __tablename__ = "management_systems"
+    __table_args__ = (
+        active_index("management_systems", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -24,6 +27,9 @@ class ManagementSystem(Base):
 
 class Laboratory(Base):
     __tablename__ = "laboratories"
+    __table_args__ = (
+        active_index("laboratories", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
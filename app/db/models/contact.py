@@ -1,9 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Index, text
 from sqlalchemy.sql import func
-from app.db.database import Base
+from app.db.database import Base, single_active_index, trigram_indexes
 
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = trigram_indexes("contacts", "full_name", "email", "subject", "message") + (
+        # Newest-first inquiry list
+        Index("ix_contacts_created_at", "created_at", "id"),
+        # Unread contacts by age, used by the maintenance cleanup
+        Index(
+            "ix_contacts_unread_created_at",
+            "created_at",
+            postgresql_where=text("is_read = false"),
+            sqlite_where=text("is_read = 0")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -30,6 +41,9 @@ class Contact(Base):
 
 class AntiCorruption(Base):
     __tablename__ = "anti_corruption"
+    __table_args__ = (
+        single_active_index("anti_corruption"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class DashboardCounter(Base):
+    __tablename__ = "dashboard_counters"
+    
+    # Dotted path in the dashboard response, e.g. "content.news.total"
+    key = Column(String(100), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,9 +1,12 @@
 from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
 from sqlalchemy.sql import func
-from app.db.database import Base
+from app.db.database import Base, active_index, search_vector_column, single_active_index
 
 class About(Base):
     __tablename__ = "about"
+    __table_args__ = (
+        single_active_index("about"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -24,6 +27,9 @@ class About(Base):
 
 class Management(Base):
     __tablename__ = "management"
+    __table_args__ = (
+        active_index("management", "display_order"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -66,6 +72,9 @@ class Management(Base):
 
 class Structure(Base):
     __tablename__ = "structure"
+    __table_args__ = (
+        single_active_index("structure"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -83,6 +92,9 @@ class Structure(Base):
 
 class StructuralDivision(Base):
     __tablename__ = "structural_divisions"
+    __table_args__ = (
+        active_index("structural_divisions", "display_order"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -125,6 +137,9 @@ class StructuralDivision(Base):
 
 class Vacancy(Base):
     __tablename__ = "vacancies"
+    __table_args__ = (
+        active_index("vacancies", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -158,3 +173,24 @@ class Vacancy(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+search_vector_column(
+    Management.__table__,
+    Management.full_name_uz, Management.position_uz,
+    Management.full_name_ru, Management.position_ru,
+    Management.full_name_en, Management.position_en
+)
+
+search_vector_column(
+    StructuralDivision.__table__,
+    StructuralDivision.full_name_uz, StructuralDivision.position_uz, StructuralDivision.department_uz,
+    StructuralDivision.full_name_ru, StructuralDivision.position_ru, StructuralDivision.department_ru,
+    StructuralDivision.full_name_en, StructuralDivision.position_en, StructuralDivision.department_en
+)
+
+search_vector_column(
+    Vacancy.__table__,
+    Vacancy.position_uz, Vacancy.department_uz,
+    Vacancy.position_ru, Vacancy.department_ru,
+    Vacancy.position_en, Vacancy.department_en
+)
@@ -1,9 +1,15 @@
 from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
 from sqlalchemy.sql import func
-from app.db.database import Base
+from app.db.database import Base, active_index, search_vector_column, trigram_indexes
 
 class News(Base):
     __tablename__ = "news"
+    __table_args__ = trigram_indexes(
+        "news", "title_uz", "title_ru", "title_en", "content_uz", "content_ru", "content_en"
+    ) + (
+        active_index("news", "published_date", "id"),
+        active_index("news", "is_featured", "published_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -31,6 +37,9 @@ class News(Base):
 
 class Announcement(Base):
     __tablename__ = "announcements"
+    __table_args__ = (
+        active_index("announcements", "published_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -54,3 +63,17 @@ class Announcement(Base):
     published_date = Column(DateTime(timezone=True), server_default=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+search_vector_column(
+    News.__table__,
+    News.title_uz, News.content_uz,
+    News.title_ru, News.content_ru,
+    News.title_en, News.content_en
+)
+
+search_vector_column(
+    Announcement.__table__,
+    Announcement.title_uz, Announcement.content_uz,
+    Announcement.title_ru, Announcement.content_ru,
+    Announcement.title_en, Announcement.content_en
+)
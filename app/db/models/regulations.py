@@ -1,9 +1,14 @@
 from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
 from sqlalchemy.sql import func
-from app.db.database import Base
+from app.db.database import Base, active_index, trigram_indexes
 
 class Law(Base):
     __tablename__ = "laws"
+    __table_args__ = trigram_indexes(
+        "laws", "name_uz", "name_ru", "name_en", "authority_uz", "authority_ru", "authority_en", "order_number"
+    ) + (
+        active_index("laws", "adoption_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     order_number = Column(String(50), nullable=False)
@@ -32,6 +37,9 @@ class Law(Base):
 
 class UrbanNorm(Base):
     __tablename__ = "urban_norms"
+    __table_args__ = trigram_indexes("urban_norms", "name_uz", "name_ru", "name_en", "document_code") + (
+        active_index("urban_norms", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     document_code = Column(String(50), nullable=False, unique=True)
@@ -52,6 +60,9 @@ class UrbanNorm(Base):
 
 class Standard(Base):
     __tablename__ = "standards"
+    __table_args__ = trigram_indexes("standards", "name_uz", "name_ru", "name_en") + (
+        active_index("standards", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -71,6 +82,11 @@ class Standard(Base):
 
 class BuildingRegulation(Base):
     __tablename__ = "building_regulations"
+    __table_args__ = trigram_indexes(
+        "building_regulations", "name_uz", "name_ru", "name_en", "document_number"
+    ) + (
+        active_index("building_regulations", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     document_number = Column(String(50), nullable=False)
@@ -92,6 +108,11 @@ class BuildingRegulation(Base):
 
 class SmetaResourceNorm(Base):
     __tablename__ = "smeta_resource_norms"
+    __table_args__ = trigram_indexes(
+        "smeta_resource_norms", "shnq_name_uz", "shnq_name_ru", "shnq_name_en", "document_number"
+    ) + (
+        active_index("smeta_resource_norms", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     document_number = Column(String(50), nullable=False)
@@ -111,6 +132,11 @@ class SmetaResourceNorm(Base):
 
 class Reference(Base):
     __tablename__ = "references"
+    __table_args__ = trigram_indexes(
+        "references", "name_uz", "name_ru", "name_en", "reference_number"
+    ) + (
+        active_index("references", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     reference_number = Column(String(50), nullable=False)
@@ -1,9 +1,10 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
 from sqlalchemy.sql import func
-from app.db.database import Base
+from app.db.database import Base, trigram_indexes
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = trigram_indexes("users", "username", "full_name", "email")
     
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, index=True, nullable=False)
@@ -1,36 +1,77 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import auth, user, news, regulations, institute, activity, contact, admin
 from app.middlewares.language import LanguageMiddleware
-from app.db.database import engine, Base
-import os
+from app.middlewares.query_counter import QueryCounterMiddleware, track_queries
+from app.middlewares.upload_limit import UploadLimitMiddleware
+from app.db.database import engine, async_engine, create_schema, detect_search_vectors, prewarm_pool
+from app.core.config import settings
+from app.services.dashboard import run_dashboard_refresher
+from contextlib import asynccontextmanager
+import asyncio
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create missing tables on the async engine instead of blocking at import
+    if settings.db_auto_create:
+        async with async_engine.begin() as connection:
+            await connection.run_sync(create_schema)
+    async with async_engine.connect() as connection:
+        await connection.run_sync(detect_search_vectors)
+    await prewarm_pool(min(settings.db_pool_prewarm, settings.db_pool_size))
+    refresher = asyncio.create_task(run_dashboard_refresher(settings.dashboard_refresh_interval))
+    yield
+    refresher.cancel()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="TMSITI API",
     description="Technical Standardization and Research Institute API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# CORS middleware
+# Language middleware
+app.add_middleware(LanguageMiddleware)
+
+# Oversized uploads are refused before their body is read
+app.add_middleware(UploadLimitMiddleware)
+
+# SQL statement counting, development only
+if settings.debug:
+    track_queries(engine, async_engine)
+    app.add_middleware(QueryCounterMiddleware)
+
+def split_csv(value: str) -> tuple:
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+# CORS middleware, added last so it is the outermost layer: preflight
+# requests are answered before any other middleware runs, and errors
+# returned by the inner middlewares still carry CORS headers
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=split_csv(settings.cors_origins),
+    allow_credentials=settings.cors_credentials,
+    allow_methods=split_csv(settings.cors_methods),
+    allow_headers=split_csv(settings.cors_headers),
+    max_age=settings.cors_max_age,
 )
 
-# Language middleware
-app.add_middleware(LanguageMiddleware)
+class CachedStaticFiles(StaticFiles):
+    """Static files with a Cache-Control header, so browsers and proxies keep them"""
+    
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = f"public, max-age={settings.static_cache_max_age}"
+        return response
 
-# Static files
-os.makedirs("static/uploads", exist_ok=True)
-os.makedirs("static/default", exist_ok=True)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Static files; static/uploads and static/default ship with the repository
+# and create_tables.py creates the upload subdirectories
+if settings.serve_static:
+    app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 # API routes
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
@@ -1,20 +1,81 @@
 from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
-from typing import Callable
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from functools import lru_cache, partial
+from typing import Optional
 from app.core.config import settings
-import json
+import orjson
 import os
 
-class LanguageMiddleware(BaseHTTPMiddleware):
+SUPPORTED_LANGUAGES = frozenset(settings.supported_languages)
+
+def flatten_localization(tree: dict, prefix: str = "") -> dict:
+    """Flatten nested localization sections into ``{"section.key": text}``"""
+    flat = {}
+    for key, value in tree.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_localization(value, f"{path}."))
+        else:
+            flat[path] = value
+    return flat
+
+@lru_cache(maxsize=256)
+def localized_field_names(field_prefix: str) -> tuple:
+    """``(language, field name)`` pairs for a field prefix, in supported language order"""
+    return tuple((lang, f"{field_prefix}_{lang}") for lang in settings.supported_languages)
+
+@lru_cache(maxsize=4096)
+def parse_accept_language(accept_language: str) -> Optional[str]:
+    """
+    Pick the highest quality supported language from an Accept-Language header
+    
+    Browsers send a small set of recurring headers, so results are memoized
+    by the raw header value.
+    
+    Returns:
+        Language code, or None if no supported language is listed
+    """
+    best_language = None
+    best_quality = -1.0
+    for lang_tag in accept_language.split(','):
+        if ';' in lang_tag:
+            lang, quality = lang_tag.split(';', 1)
+            try:
+                quality_value = float(quality.split('=')[1])
+            except (IndexError, ValueError):
+                quality_value = 1.0
+        else:
+            lang = lang_tag
+            quality_value = 1.0
+        
+        # Extract language code (e.g., 'en' from 'en-US')
+        lang = lang.strip().lower().split('-')[0]
+        
+        # The first of equally weighted languages wins
+        if lang in SUPPORTED_LANGUAGES and quality_value > best_quality:
+            best_language, best_quality = lang, quality_value
+    
+    return best_language
+
+class LanguageMiddleware:
     """
     Middleware to handle language detection and localization
+    
+    Written as plain ASGI rather than BaseHTTPMiddleware, which runs every
+    request through an extra task group and memory streams.
     """
     
-    def __init__(self, app):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp):
+        self.app = app
         self.localization_cache = {}
         self._load_localization_files()
+        # One localize function per language, shared by all requests
+        self._localize_by_language = {
+            language: partial(self._get_localized_text, language=language)
+            for language in settings.supported_languages
+        }
     
     def _load_localization_files(self):
         """Load localization files into cache"""
@@ -23,16 +84,16 @@ class LanguageMiddleware(BaseHTTPMiddleware):
         for language in settings.supported_languages:
             file_path = os.path.join(localization_dir, f"{language}.json")
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    self.localization_cache[language] = json.load(f)
+                with open(file_path, 'rb') as f:
+                    self.localization_cache[language] = flatten_localization(orjson.loads(f.read()))
             except FileNotFoundError:
                 # Create empty localization if file doesn't exist
                 self.localization_cache[language] = {}
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 # Handle invalid JSON
                 self.localization_cache[language] = {}
     
-    def _detect_language(self, request: Request) -> str:
+    def _detect_language(self, connection: HTTPConnection) -> str:
         """
         Detect language from request
         
@@ -43,44 +104,15 @@ class LanguageMiddleware(BaseHTTPMiddleware):
         """
         
         # Check query parameter
-        lang_param = request.query_params.get('lang')
-        if lang_param and lang_param in settings.supported_languages:
+        lang_param = connection.query_params.get('lang')
+        if lang_param and lang_param in SUPPORTED_LANGUAGES:
             return lang_param
         
         # Check Accept-Language header
-        accept_language = request.headers.get('Accept-Language', '')
-        
-        # Parse Accept-Language header
-        languages = []
-        for lang_tag in accept_language.split(','):
-            if ';' in lang_tag:
-                lang, quality = lang_tag.split(';', 1)
-                try:
-                    quality_value = float(quality.split('=')[1])
-                except (IndexError, ValueError):
-                    quality_value = 1.0
-            else:
-                lang = lang_tag
-                quality_value = 1.0
-            
-            lang = lang.strip().lower()
-            
-            # Extract language code (e.g., 'en' from 'en-US')
-            if '-' in lang:
-                lang = lang.split('-')[0]
-            
-            if lang in settings.supported_languages:
-                languages.append((lang, quality_value))
-        
-        # Sort by quality value (descending)
-        languages.sort(key=lambda x: x[1], reverse=True)
-        
-        # Return the highest quality supported language
-        if languages:
-            return languages[0][0]
-        
-        # Return default language
-        return settings.default_language
+        return (
+            parse_accept_language(connection.headers.get('Accept-Language', ''))
+            or settings.default_language
+        )
     
     def _get_localized_text(self, key: str, language: str, **kwargs) -> str:
         """
@@ -94,44 +126,44 @@ class LanguageMiddleware(BaseHTTPMiddleware):
         Returns:
             Localized text or key if not found
         """
-        try:
-            # Get text from cache
-            localization = self.localization_cache.get(language, {})
-            text = localization.get(key, key)
-            
-            # Format with variables if provided
-            if kwargs:
-                text = text.format(**kwargs)
-            
+        text = self.localization_cache.get(language, {}).get(key)
+        if text is None:
+            return key
+        if not kwargs:
             return text
-        except Exception:
+        
+        try:
+            return text.format(**kwargs)
+        except (KeyError, IndexError, ValueError):
             return key
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request and add language information"""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        connection = HTTPConnection(scope)
         
         # Detect language
-        detected_language = self._detect_language(request)
+        detected_language = self._detect_language(connection)
         
         # Add language information to request state
-        request.state.language = detected_language
+        connection.state.language = detected_language
         
         # Add localization function to request state
-        def localize(key: str, **kwargs) -> str:
-            return self._get_localized_text(key, detected_language, **kwargs)
-        
-        request.state.localize = localize
+        connection.state.localize = self._localize_by_language[detected_language]
         
         # Add available languages to request state
-        request.state.available_languages = settings.supported_languages
-        
-        # Process request
-        response = await call_next(request)
+        connection.state.available_languages = settings.supported_languages
         
-        # Add language header to response
-        response.headers["Content-Language"] = detected_language
+        async def send_with_language(message: Message) -> None:
+            # Add language header to response
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["Content-Language"] = detected_language
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_language)
 
 def get_language_from_request(request: Request) -> str:
     """
@@ -174,17 +206,19 @@ def get_localized_model_field(obj, field_prefix: str, language: str) -> str:
     Returns:
         Localized field value
     """
-    # Try exact language match
-    field_name = f"{field_prefix}_{language}"
-    value = getattr(obj, field_name, None)
+    field_names = localized_field_names(field_prefix)
     
-    if value:
-        return value
+    # Try exact language match
+    for lang, field_name in field_names:
+        if lang == language:
+            value = getattr(obj, field_name, None)
+            if value:
+                return value
+            break
     
     # Try fallback languages
-    for fallback_lang in settings.supported_languages:
+    for fallback_lang, fallback_field in field_names:
         if fallback_lang != language:
-            fallback_field = f"{field_prefix}_{fallback_lang}"
             fallback_value = getattr(obj, fallback_field, None)
             if fallback_value:
                 return fallback_value
@@ -206,12 +240,7 @@ class LocalizationHelper:
         Returns:
             Dictionary with language codes as keys
         """
-        result = {}
-        for lang in settings.supported_languages:
-            field_name = f"{field_prefix}_{lang}"
-            value = getattr(obj, field_name, "")
-            result[lang] = value
-        return result
+        return {lang: getattr(obj, field_name, "") for lang, field_name in localized_field_names(field_prefix)}
     
     @staticmethod
     def set_multilingual_field(obj, field_prefix: str, values: dict):
@@ -223,8 +252,7 @@ class LocalizationHelper:
             field_prefix: Field prefix
             values: Dictionary with language codes as keys
         """
-        for lang in settings.supported_languages:
-            field_name = f"{field_prefix}_{lang}"
+        for lang, field_name in localized_field_names(field_prefix):
             if lang in values and hasattr(obj, field_name):
                 setattr(obj, field_name, values[lang])
     
@@ -244,7 +272,9 @@ class LocalizationHelper:
             required_languages = settings.supported_languages
         
         for lang in required_languages:
-            if lang not in data or not data[lang].strip():
+            # isspace() tests blankness without copying long content like strip()
+            value = data.get(lang)
+            if not value or value.isspace():
                 return False
         
         return True
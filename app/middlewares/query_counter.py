@@ -0,0 +1,48 @@
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+from sqlalchemy import event
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Mutable holder so statements run in child tasks still count towards the request
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+def track_queries(*engines) -> None:
+    """Count statements executed on the given engines for QueryCounterMiddleware"""
+    for engine in engines:
+        event.listen(getattr(engine, "sync_engine", engine), "before_cursor_execute", _count_query)
+
+class QueryCounterMiddleware(BaseHTTPMiddleware):
+    """
+    Debug middleware reporting how many SQL statements a request executed
+    
+    Adds an ``X-Query-Count`` header and logs a warning when a request goes
+    over ``settings.query_count_warning``, which is how lazy loads in list
+    endpoints (N+1 queries) show up.
+    """
+    
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        counter = [0]
+        token = _request_queries.set(counter)
+        try:
+            response = await call_next(request)
+        finally:
+            _request_queries.reset(token)
+        
+        response.headers["X-Query-Count"] = str(counter[0])
+        if counter[0] > settings.query_count_warning:
+            logger.warning(
+                "%s %s executed %d SQL statements",
+                request.method, request.url.path, counter[0]
+            )
+        return response
@@ -0,0 +1,42 @@
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+
+# Room for multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadLimitMiddleware:
+    """
+    Reject multipart uploads whose declared Content-Length is already over
+    ``settings.max_file_size``, before the body is read and spooled to disk
+    
+    Requests without a Content-Length (chunked) still go through and are
+    limited by save_uploaded_file while the file is written.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Answer oversized uploads with 413; pass every other request straight through"""
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+        
+        headers = Headers(scope=scope)
+        content_length = headers.get("content-length", "")
+        if (
+            headers.get("content-type", "").startswith("multipart/form-data")
+            and content_length.isdigit()
+            and int(content_length) > settings.max_file_size + MULTIPART_OVERHEAD
+        ):
+            response = JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": f"File size exceeds maximum allowed size of {settings.max_file_size} bytes"}
+            )
+            await response(scope, receive, send)
+            return
+        
+        await self.app(scope, receive, send)
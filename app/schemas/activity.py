@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import datetime
 
@@ -22,8 +22,7 @@ class ManagementSystem(ManagementSystemBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class LaboratoryBase(BaseModel):
     ksl_link: Optional[str] = "https://ksl.uz"
@@ -46,5 +45,4 @@ class Laboratory(LaboratoryBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
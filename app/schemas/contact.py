@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, ConfigDict
 from typing import Optional
 from datetime import datetime
+from app.schemas.types import Email
 
 class ContactBase(BaseModel):
     full_name: str
@@ -18,6 +19,8 @@ class ContactUpdate(BaseModel):
     admin_response: Optional[str] = None
 
 class Contact(ContactBase):
+    # Validated as EmailStr when the message was submitted
+    email: str
     id: int
     is_read: bool
     is_replied: bool
@@ -25,15 +28,14 @@ class Contact(ContactBase):
     responded_at: Optional[datetime] = None
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AntiCorruptionBase(BaseModel):
     content_uz: str
     content_ru: str
     content_en: str
     contact_phone: Optional[str] = None
-    contact_email: Optional[EmailStr] = None
+    contact_email: Optional[Email] = None
     hotline_uz: Optional[str] = None
     hotline_ru: Optional[str] = None
     hotline_en: Optional[str] = None
@@ -46,7 +48,7 @@ class AntiCorruptionUpdate(BaseModel):
     content_ru: Optional[str] = None
     content_en: Optional[str] = None
     contact_phone: Optional[str] = None
-    contact_email: Optional[EmailStr] = None
+    contact_email: Optional[Email] = None
     hotline_uz: Optional[str] = None
     hotline_ru: Optional[str] = None
     hotline_en: Optional[str] = None
@@ -57,5 +59,4 @@ class AntiCorruption(AntiCorruptionBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
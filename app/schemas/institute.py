@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import datetime
+from app.schemas.types import Email
 
 class AboutBase(BaseModel):
     content_uz: str
@@ -22,8 +23,7 @@ class About(AboutBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ManagementBase(BaseModel):
     full_name_uz: str
@@ -33,7 +33,7 @@ class ManagementBase(BaseModel):
     position_ru: str
     position_en: str
     phone: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
     reception_days_uz: Optional[str] = None
     reception_days_ru: Optional[str] = None
     reception_days_en: Optional[str] = None
@@ -53,7 +53,7 @@ class ManagementUpdate(BaseModel):
     position_ru: Optional[str] = None
     position_en: Optional[str] = None
     phone: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
     reception_days_uz: Optional[str] = None
     reception_days_ru: Optional[str] = None
     reception_days_en: Optional[str] = None
@@ -69,8 +69,7 @@ class Management(ManagementBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StructureBase(BaseModel):
     content_uz: str
@@ -91,8 +90,7 @@ class Structure(StructureBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StructuralDivisionBase(BaseModel):
     full_name_uz: str
@@ -105,7 +103,7 @@ class StructuralDivisionBase(BaseModel):
     department_ru: str
     department_en: str
     phone: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
     bio_uz: Optional[str] = None
     bio_ru: Optional[str] = None
     bio_en: Optional[str] = None
@@ -125,7 +123,7 @@ class StructuralDivisionUpdate(BaseModel):
     department_ru: Optional[str] = None
     department_en: Optional[str] = None
     phone: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
     bio_uz: Optional[str] = None
     bio_ru: Optional[str] = None
     bio_en: Optional[str] = None
@@ -138,8 +136,7 @@ class StructuralDivision(StructuralDivisionBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class VacancyBase(BaseModel):
     position_uz: str
@@ -182,5 +179,4 @@ class Vacancy(VacancyBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
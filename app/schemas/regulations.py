@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import datetime
 
@@ -35,8 +35,7 @@ class Law(LawBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UrbanNormBase(BaseModel):
     document_code: str
@@ -61,8 +60,7 @@ class UrbanNorm(UrbanNormBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StandardBase(BaseModel):
     name_uz: str
@@ -84,8 +82,7 @@ class Standard(StandardBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class BuildingRegulationBase(BaseModel):
     document_number: str
@@ -111,8 +108,7 @@ class BuildingRegulation(BuildingRegulationBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class SmetaResourceNormBase(BaseModel):
     document_number: str
@@ -137,8 +133,7 @@ class SmetaResourceNorm(SmetaResourceNormBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ReferenceBase(BaseModel):
     reference_number: str
@@ -162,5 +157,4 @@ class Reference(ReferenceBase):
     is_active: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,15 @@
+import re
+from typing import Annotated
+from pydantic import AfterValidator
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+def validate_email(value: str) -> str:
+    """Cheap shape check for addresses entered by admins"""
+    if not EMAIL_PATTERN.match(value):
+        raise ValueError("value is not a valid email address")
+    return value
+
+# Used instead of EmailStr on admin-managed content, which is re-validated on
+# every response; public forms keep the full EmailStr validation
+Email = Annotated[str, AfterValidator(validate_email)]
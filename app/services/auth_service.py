@@ -1,8 +1,8 @@
 from typing import Optional, Dict, Any
+from sqlalchemy import func, insert, update
 from sqlalchemy.orm import Session
 from app.db.models.user import User
 from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
-from datetime import datetime
 
 class AuthService:
     """Authentication service for handling user authentication operations"""
@@ -20,10 +20,12 @@ class AuthService:
         Returns:
             User object if authentication successful, None otherwise
         """
-        # Try to find user by username or email
-        user = db.query(User).filter(
-            (User.username == username) | (User.email == username)
-        ).first()
+        # Look up by username, then by email: two unique-index seeks
+        # instead of an OR that the planner may turn into a scan
+        user = (
+            db.query(User).filter(User.username == username).first()
+            or db.query(User).filter(User.email == username).first()
+        )
         
         if not user:
             return None
@@ -34,8 +36,8 @@ class AuthService:
         if not user.is_active:
             return None
         
-        # Update last login time
-        user.last_login = datetime.utcnow()
+        # Update last login time with a plain UPDATE, skipping the unit of work
+        db.execute(update(User).where(User.id == user.id).values(last_login=func.now()))
         db.commit()
         
         return user
@@ -91,20 +93,20 @@ class AuthService:
         """
         hashed_password = get_password_hash(password)
         
-        db_user = User(
-            username=username,
-            email=email,
-            full_name=full_name,
-            hashed_password=hashed_password,
-            phone=phone,
-            bio=bio,
-            is_admin=is_admin,
-            is_moderator=is_moderator
+        # INSERT ... RETURNING brings back id and created_at without a refresh query
+        db_user = db.scalar(
+            insert(User).values(
+                username=username,
+                email=email,
+                full_name=full_name,
+                hashed_password=hashed_password,
+                phone=phone,
+                bio=bio,
+                is_admin=is_admin,
+                is_moderator=is_moderator
+            ).returning(User)
         )
-        
-        db.add(db_user)
         db.commit()
-        db.refresh(db_user)
         
         return db_user
     
@@ -272,7 +274,7 @@ class AuthService:
         if exclude_user_id:
             query = query.filter(User.id != exclude_user_id)
         
-        return query.first() is None
+        return not db.query(query.exists()).scalar()
     
     @staticmethod
     def is_email_available(db: Session, email: str, exclude_user_id: Optional[int] = None) -> bool:
@@ -291,4 +293,4 @@ class AuthService:
         if exclude_user_id:
             query = query.filter(User.id != exclude_user_id)
         
-        return query.first() is None
+        return not db.query(query.exists()).scalar()
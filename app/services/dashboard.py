@@ -0,0 +1,167 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.core.cache import cache
+from app.db.database import AsyncSessionLocal, async_engine
+from app.db.models.user import User
+from app.db.models.news import News, Announcement
+from app.db.models.regulations import Law, UrbanNorm, Standard, BuildingRegulation
+from app.db.models.institute import Management, StructuralDivision, Vacancy
+from app.db.models.contact import Contact
+from app.db.models.dashboard import DashboardCounter
+
+logger = logging.getLogger(__name__)
+
+# Counter groups in the order they appear in the dashboard response,
+# matching the order of the queries in compute_dashboard_counters
+DASHBOARD_GROUPS = (
+    "users",
+    "content.news",
+    "content.announcements",
+    "regulations",
+    "contacts",
+    "institute",
+)
+
+# Lease that lets a single worker recount per refresh interval
+REFRESH_LEASE_KEY = "tmsiti:lease:dashboard-refresh"
+
+async def _fetch_one(statement):
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(statement)).one()
+
+async def compute_dashboard_counters() -> Dict[str, int]:
+    """
+    Count dashboard statistics from the content tables
+    
+    Returns:
+        Flat mapping of "group.name" keys to counts
+    """
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    
+    # One row of aggregates per table instead of one query per counter
+    users_query = select(
+        func.count().label("total"),
+        func.count().filter(User.is_active == True).label("active"),
+        func.count().filter(User.is_admin == True).label("admins"),
+        func.count().filter(User.is_moderator == True).label("moderators"),
+        func.count().filter(User.created_at >= week_ago).label("recent")
+    ).select_from(User)
+    
+    news_query = select(
+        func.count().label("total"),
+        func.count().filter(News.is_active == True).label("active"),
+        func.count().filter(and_(News.is_active == True, News.is_featured == True)).label("featured"),
+        func.count().filter(News.created_at >= week_ago).label("recent")
+    ).select_from(News)
+    
+    announcements_query = select(
+        func.count().label("total"),
+        func.count().filter(Announcement.is_active == True).label("active")
+    ).select_from(Announcement)
+    
+    contacts_query = select(
+        func.count().label("total"),
+        func.count().filter(Contact.is_read == False).label("unread"),
+        func.count().filter(Contact.is_replied == True).label("replied"),
+        func.count().filter(Contact.created_at >= week_ago).label("recent")
+    ).select_from(Contact)
+    
+    # Tables with a single counter each are combined as scalar subqueries
+    regulations_query = select(
+        select(func.count()).select_from(Law).scalar_subquery().label("laws"),
+        select(func.count()).select_from(Standard).scalar_subquery().label("standards"),
+        select(func.count()).select_from(UrbanNorm).scalar_subquery().label("urban_norms"),
+        select(func.count()).select_from(BuildingRegulation).scalar_subquery().label("building_regulations")
+    )
+    
+    institute_query = select(
+        select(func.count()).select_from(Management).where(Management.is_active == True).scalar_subquery().label("management"),
+        select(func.count()).select_from(StructuralDivision).where(StructuralDivision.is_active == True).scalar_subquery().label("divisions"),
+        select(func.count()).select_from(Vacancy).where(Vacancy.is_active == True).scalar_subquery().label("vacancies")
+    )
+    
+    rows = await asyncio.gather(
+        _fetch_one(users_query),
+        _fetch_one(news_query),
+        _fetch_one(announcements_query),
+        _fetch_one(regulations_query),
+        _fetch_one(contacts_query),
+        _fetch_one(institute_query)
+    )
+    
+    return {
+        f"{group}.{name}": value
+        for group, row in zip(DASHBOARD_GROUPS, rows)
+        for name, value in row._asdict().items()
+    }
+
+def _upsert_counters(counters: Dict[str, int]):
+    insert = postgresql_insert if async_engine.dialect.name == "postgresql" else sqlite_insert
+    statement = insert(DashboardCounter).values([
+        {"key": key, "value": value, "updated_at": datetime.utcnow()}
+        for key, value in counters.items()
+    ])
+    return statement.on_conflict_do_update(
+        index_elements=[DashboardCounter.key],
+        set_={"value": statement.excluded.value, "updated_at": statement.excluded.updated_at}
+    )
+
+async def refresh_dashboard_counters() -> Dict[str, int]:
+    """
+    Recount dashboard statistics and store them in dashboard_counters
+    
+    Returns:
+        The freshly computed counters
+    """
+    counters = await compute_dashboard_counters()
+    async with AsyncSessionLocal() as session:
+        await session.execute(_upsert_counters(counters))
+        await session.commit()
+    return counters
+
+async def load_dashboard_stats() -> Dict[str, Any]:
+    """
+    Read dashboard statistics from dashboard_counters, counting them
+    directly if the table has not been filled yet
+    
+    Returns:
+        Nested statistics in the dashboard response layout
+    """
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(select(DashboardCounter.key, DashboardCounter.value))).all()
+    counters = {row.key: row.value for row in rows} or await refresh_dashboard_counters()
+    
+    stats: Dict[str, Any] = {}
+    
+    def group_stats(group: str) -> Dict[str, Any]:
+        target = stats
+        for part in group.split("."):
+            target = target.setdefault(part, {})
+        return target
+    
+    for group in DASHBOARD_GROUPS:
+        group_stats(group)
+    for key, value in counters.items():
+        group, name = key.rsplit(".", 1)
+        group_stats(group)[name] = value
+    return stats
+
+async def run_dashboard_refresher(interval: int) -> None:
+    """
+    Refresh dashboard counters every ``interval`` seconds until cancelled
+    
+    Args:
+        interval: Seconds between refreshes
+    """
+    while True:
+        if await cache.claim(REFRESH_LEASE_KEY, interval):
+            try:
+                await refresh_dashboard_counters()
+            except Exception:
+                logger.exception("Dashboard counters refresh failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,70 @@
+import mimetypes
+import aiofiles.os
+from typing import Optional
+from app.core.config import settings
+
+class LocalStorage:
+    """Keeps uploads where save_uploaded_file wrote them, served by the /static mount"""
+    
+    async def store(self, file_path: str, key: str) -> str:
+        return file_path
+    
+    async def delete(self, path: str) -> bool:
+        try:
+            await aiofiles.os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def url(self, path: str, base_url: str = "") -> str:
+        return f"{base_url}/{path.lstrip('/')}"
+
+class S3Storage:
+    """
+    Moves uploads to an S3-compatible bucket; the stored path is the object key
+    
+    Credentials come from the standard AWS_* environment variables.
+    """
+    
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        public_url: Optional[str] = None
+    ):
+        import aioboto3
+        
+        self.bucket = bucket
+        self.public_url = (public_url or f"{endpoint_url or 'https://s3.amazonaws.com'}/{bucket}").rstrip("/")
+        self._session = aioboto3.Session()
+        self._client_options = {"endpoint_url": endpoint_url, "region_name": region}
+    
+    async def store(self, file_path: str, key: str) -> str:
+        content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        async with self._session.client("s3", **self._client_options) as client:
+            await client.upload_file(file_path, self.bucket, key, ExtraArgs={"ContentType": content_type})
+        await aiofiles.os.remove(file_path)
+        return key
+    
+    async def delete(self, key: str) -> bool:
+        async with self._session.client("s3", **self._client_options) as client:
+            await client.delete_object(Bucket=self.bucket, Key=key)
+        return True
+    
+    def url(self, key: str, base_url: str = "") -> str:
+        return f"{self.public_url}/{key}"
+
+def _create_storage():
+    if settings.storage_backend == "s3":
+        if not settings.s3_bucket:
+            raise ValueError("S3_BUCKET must be set when STORAGE_BACKEND is 's3'")
+        return S3Storage(
+            settings.s3_bucket,
+            endpoint_url=settings.s3_endpoint_url,
+            region=settings.s3_region,
+            public_url=settings.s3_public_url
+        )
+    return LocalStorage()
+
+storage = _create_storage()
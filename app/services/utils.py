@@ -1,11 +1,33 @@
+import asyncio
+import html
 import os
-import uuid
+import re
+import secrets
+from functools import lru_cache
 import aiofiles
+import aiofiles.os
 from typing import List, Optional, Dict, Any
 from fastapi import HTTPException, status, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from PIL import Image
-import mimetypes
+from sqlalchemy import delete, func, insert, literal_column, or_, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
 from app.core.config import settings
+from app.db.database import engine, FTS_CONFIG, SEARCH_VECTOR_COLUMN, ACTIVE_ROW_PREDICATES
+from app.services.storage import storage
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Upload kind of each accepted file extension
+UPLOAD_KINDS = {
+    **{extension: "image" for extension in settings.allowed_image_extensions},
+    **{extension: "document" for extension in settings.allowed_document_extensions},
+}
+
+# Linear-time tag matcher; unlike '<.*?>' it also strips tags split across lines
+HTML_TAG_PATTERN = re.compile(r"<[^>]*>")
 
 async def save_uploaded_file(
     file: UploadFile, 
@@ -34,138 +56,139 @@ async def save_uploaded_file(
             detail="No file provided"
         )
     
-    # Check file size
-    file_size = 0
-    content = await file.read()
-    file_size = len(content)
-    
-    if file_size > settings.max_file_size:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File size exceeds maximum allowed size of {settings.max_file_size} bytes"
-        )
-    
-    # Reset file pointer
-    await file.seek(0)
-    
     # Get file extension
     file_extension = os.path.splitext(file.filename)[1].lower()
     
     # Validate file type
-    is_valid_file = False
-    
-    if "image" in allowed_types:
-        if file_extension in settings.allowed_image_extensions:
-            is_valid_file = True
-    
-    if "document" in allowed_types:
-        if file_extension in settings.allowed_document_extensions:
-            is_valid_file = True
-    
-    if not is_valid_file:
-        allowed_extensions = []
-        if "image" in allowed_types:
-            allowed_extensions.extend(settings.allowed_image_extensions)
-        if "document" in allowed_types:
-            allowed_extensions.extend(settings.allowed_document_extensions)
-        
+    upload_kind = UPLOAD_KINDS.get(file_extension)
+    if upload_kind not in allowed_types:
+        allowed_extensions = [extension for extension, kind in UPLOAD_KINDS.items() if kind in allowed_types]
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File type not allowed. Allowed extensions: {', '.join(allowed_extensions)}"
         )
     
-    # Validate MIME type for additional security
-    mime_type, _ = mimetypes.guess_type(file.filename)
-    if mime_type:
-        if "image" in allowed_types and mime_type.startswith("image/"):
-            pass  # Valid image
-        elif "document" in allowed_types and (
-            mime_type.startswith("application/") or 
-            mime_type.startswith("text/")
-        ):
-            pass  # Valid document
-        else:
-            # Additional validation for specific types
-            allowed_mimes = []
-            if "image" in allowed_types:
-                allowed_mimes.extend(["image/jpeg", "image/png", "image/gif", "image/webp"])
-            if "document" in allowed_types:
-                allowed_mimes.extend(["application/pdf", "application/msword", 
-                                    "application/vnd.openxmlformats-officedocument.wordprocessingml.document"])
-            
-            if mime_type not in allowed_mimes:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Invalid file type. MIME type: {mime_type}"
-                )
+    # Size is known once the multipart body is parsed; refuse before copying
+    if file.size is not None and file.size > settings.max_file_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File size exceeds maximum allowed size of {settings.max_file_size} bytes"
+        )
     
     # Generate unique filename
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
+    unique_name = secrets.token_hex(16)
+    unique_filename = f"{unique_name}{file_extension}"
     
     # Create directory if it doesn't exist
     upload_dir = f"static/uploads/{folder}"
-    os.makedirs(upload_dir, exist_ok=True)
+    await aiofiles.os.makedirs(upload_dir, exist_ok=True)
     
-    # Full file path
+    # Full file path; the upload is written and checked under a temporary
+    # name (keeping the extension for Pillow) and renamed once complete
     file_path = f"{upload_dir}/{unique_filename}"
+    part_path = f"{upload_dir}/{unique_name}.part{file_extension}"
+    
+    is_image = upload_kind == "image"
     
-    # Save file
+    # Save file in chunks, checking the size as it is written
+    file_size = 0
     try:
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(content)
+        async with aiofiles.open(part_path, 'wb') as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > settings.max_file_size:
+                    break
+                await f.write(chunk)
     except Exception as e:
+        await _discard_local_file(part_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save file: {str(e)}"
         )
     
+    if file_size > settings.max_file_size:
+        await _discard_local_file(part_path)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File size exceeds maximum allowed size of {settings.max_file_size} bytes"
+        )
+    
     # Validate and resize image if it's an image file
-    if "image" in allowed_types and file_extension in settings.allowed_image_extensions:
+    if is_image:
         try:
-            await validate_and_resize_image(file_path)
+            await validate_and_resize_image(part_path)
         except Exception as e:
             # Remove the uploaded file if image processing fails
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            await _discard_local_file(part_path)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid image file: {str(e)}"
             )
     
-    return file_path
+    try:
+        await aiofiles.os.replace(part_path, file_path)
+    except Exception as e:
+        await _discard_local_file(part_path)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save file: {str(e)}"
+        )
+    
+    # Hand the finished file to the configured storage backend
+    try:
+        return await storage.store(file_path, f"uploads/{folder}/{unique_filename}")
+    except Exception as e:
+        await _discard_local_file(file_path)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save file: {str(e)}"
+        )
+
+async def _discard_local_file(file_path: str) -> None:
+    try:
+        await aiofiles.os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+def _validate_and_resize_image(file_path: str, max_width: int, max_height: int):
+    with Image.open(file_path) as img:
+        # Let JPEG decode at a reduced scale that still covers the target size
+        if img.width > max_width or img.height > max_height:
+            img.draft(img.mode, (max_width, max_height))
+        
+        # Decoding the whole image raises on truncated or corrupt data
+        img.load()
+        
+        # Convert to RGB if necessary (for PNG with transparency)
+        if img.mode in ("RGBA", "P"):
+            img = img.convert("RGB")
+        
+        # Resize if image is too large
+        if img.width > max_width or img.height > max_height:
+            # Calculate new size maintaining aspect ratio
+            ratio = min(max_width / img.width, max_height / img.height)
+            new_size = (int(img.width * ratio), int(img.height * ratio))
+            
+            # Resize image
+            img = img.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            
+            # Save resized image
+            img.save(file_path, optimize=True, quality=85)
 
 async def validate_and_resize_image(file_path: str, max_width: int = 1920, max_height: int = 1080):
     """
     Validate and resize image if necessary
     
+    Decoding and resizing run in the thread pool so they do not block the
+    event loop.
+    
     Args:
         file_path: Path to image file
         max_width: Maximum width in pixels
         max_height: Maximum height in pixels
     """
     try:
-        with Image.open(file_path) as img:
-            # Check if image is valid
-            img.verify()
-            
-            # Reopen for processing (verify() closes the image)
-            with Image.open(file_path) as img:
-                # Convert to RGB if necessary (for PNG with transparency)
-                if img.mode in ("RGBA", "P"):
-                    img = img.convert("RGB")
-                
-                # Resize if image is too large
-                if img.width > max_width or img.height > max_height:
-                    # Calculate new size maintaining aspect ratio
-                    ratio = min(max_width / img.width, max_height / img.height)
-                    new_size = (int(img.width * ratio), int(img.height * ratio))
-                    
-                    # Resize image
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                    
-                    # Save resized image
-                    img.save(file_path, optimize=True, quality=85)
-    
+        await run_in_threadpool(_validate_and_resize_image, file_path, max_width, max_height)
     except Exception as e:
         raise Exception(f"Image validation/processing failed: {str(e)}")
 
@@ -180,13 +203,45 @@ def delete_file(file_path: str) -> bool:
         True if successful, False otherwise
     """
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            return True
+        os.unlink(file_path)
+        return True
+    except FileNotFoundError:
         return False
     except Exception:
         return False
 
+async def delete_files(*file_paths: Optional[str]) -> None:
+    """
+    Delete several files from storage, skipping empty paths
+    
+    Meant to run as a background task after the owning row is deleted.
+    
+    Args:
+        file_paths: Paths to files to delete
+    """
+    # Deletions are independent, so let the thread pool (or S3) run them together
+    await asyncio.gather(*(delete_file_async(file_path) for file_path in file_paths if file_path))
+
+async def delete_file_async(file_path: str) -> bool:
+    """
+    Delete file from storage without blocking the event loop
+    
+    Args:
+        file_path: Path to file to delete
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        return await storage.delete(file_path)
+    except Exception:
+        return False
+
+@lru_cache(maxsize=256)
+def _localized_lookup_order(field_prefix: str, language: str) -> tuple:
+    fallbacks = tuple(lang for lang in settings.supported_languages if lang != language)
+    return tuple(f"{field_prefix}_{lang}" for lang in (language,) + fallbacks)
+
 def get_localized_content(obj: Any, field_prefix: str, language: str) -> str:
     """
     Get localized content from object based on language
@@ -199,22 +254,29 @@ def get_localized_content(obj: Any, field_prefix: str, language: str) -> str:
     Returns:
         Localized content string
     """
-    field_name = f"{field_prefix}_{language}"
-    
-    # Try to get the content in requested language
-    content = getattr(obj, field_name, None)
+    # Requested language first, then the others in supported language order
+    for field_name in _localized_lookup_order(field_prefix, language):
+        content = getattr(obj, field_name, None)
+        if content:
+            return content
     
-    # If not found, try fallback languages
-    if not content:
-        fallback_languages = ["uz", "ru", "en"]
-        for fallback_lang in fallback_languages:
-            if fallback_lang != language:
-                fallback_field = f"{field_prefix}_{fallback_lang}"
-                content = getattr(obj, fallback_field, None)
-                if content:
-                    break
+    return ""
+
+def localized_columns(model_class: Any, *field_prefixes: str) -> Dict[str, tuple]:
+    """
+    Map each supported language to the model's localized columns
     
-    return content or ""
+    Args:
+        model_class: SQLAlchemy model class
+        field_prefixes: Field prefixes (e.g., 'title', 'content')
+        
+    Returns:
+        Dictionary with language codes as keys and column tuples as values
+    """
+    return {
+        language: tuple(getattr(model_class, f"{prefix}_{language}") for prefix in field_prefixes)
+        for language in settings.supported_languages
+    }
 
 def get_file_url(file_path: Optional[str], request_base_url: str = "") -> Optional[str]:
     """
@@ -230,11 +292,7 @@ def get_file_url(file_path: Optional[str], request_base_url: str = "") -> Option
     if not file_path:
         return None
     
-    # Remove leading slash if present
-    if file_path.startswith("/"):
-        file_path = file_path[1:]
-    
-    return f"{request_base_url}/{file_path}"
+    return storage.url(file_path, request_base_url)
 
 def get_default_image_url(request_base_url: str = "") -> str:
     """
@@ -267,13 +325,192 @@ def validate_pagination_params(skip: int, limit: int) -> tuple[int, int]:
     
     return skip, limit
 
+def paginate_newest_first(
+    query: Any,
+    model_class: Any,
+    sort_field: str,
+    skip: int,
+    limit: int,
+    after_id: Optional[int] = None
+) -> Any:
+    """
+    Order a select newest first and apply either keyset or offset pagination
+    
+    Args:
+        query: SQLAlchemy select to paginate
+        model_class: SQLAlchemy model class with an ``id`` column
+        sort_field: Name of the timestamp column to sort by
+        skip: Number of records to skip, ignored when ``after_id`` is given
+        limit: Number of records to return
+        after_id: Id of the last item of the previous page
+        
+    Returns:
+        Paginated select
+    """
+    sort_column = getattr(model_class, sort_field)
+    query = query.order_by(sort_column.desc(), model_class.id.desc()).limit(limit)
+    if after_id is None:
+        return query.offset(skip)
+    
+    # Seek past the cursor row using its stored sort value, so deep pages
+    # cost the same as the first one and clients only need to send an id
+    cursor = aliased(model_class)
+    cursor_value = select(getattr(cursor, sort_field)).where(cursor.id == after_id).scalar_subquery()
+    return query.where(tuple_(sort_column, model_class.id) < tuple_(cursor_value, after_id))
+
+async def insert_row(db: Any, model_class: Any, values: Dict[str, Any]) -> Any:
+    """
+    Insert a row with a single INSERT ... RETURNING
+    
+    Server defaults such as ``created_at`` come back with the insert, so
+    no refresh query is needed afterwards.
+    
+    Args:
+        db: Async database session
+        model_class: SQLAlchemy model class
+        values: Column values to insert
+        
+    Returns:
+        The inserted object
+    """
+    return await db.scalar(insert(model_class).values(**values).returning(model_class))
+
+async def update_by_id(db: Any, model_class: Any, object_id: int, values: Dict[str, Any]) -> Any:
+    """
+    Update a row by primary key with a single UPDATE ... RETURNING
+    
+    Args:
+        db: Async database session
+        model_class: SQLAlchemy model class with an ``id`` column
+        object_id: Primary key of the row to update
+        values: Column values to set
+        
+    Returns:
+        The updated object, or None if no row has the given id
+    """
+    if not values:
+        return await db.get(model_class, object_id)
+    return await db.scalar(
+        update(model_class)
+        .where(model_class.id == object_id)
+        .values(**values)
+        .returning(model_class)
+    )
+
+async def delete_by_id(db: Any, model_class: Any, object_id: int, *columns: Any) -> Any:
+    """
+    Delete a row by primary key with a single DELETE ... RETURNING
+    
+    Args:
+        db: Async database session
+        model_class: SQLAlchemy model class with an ``id`` column
+        object_id: Primary key of the row to delete
+        columns: Columns of the deleted row to return, the id if none are given
+        
+    Returns:
+        Row with the requested columns, or None if no row has the given id
+    """
+    result = await db.execute(
+        delete(model_class)
+        .where(model_class.id == object_id)
+        .returning(*(columns or (model_class.id,)))
+    )
+    return result.first()
+
+async def upsert_active_singleton(db: Any, model_class: Any, values: Dict[str, Any]) -> Any:
+    """
+    Insert the single active row of a model or update it if it already exists
+    
+    Relies on the model's single_active_index as the conflict target, so
+    concurrent requests cannot create two active rows.
+    
+    Args:
+        db: Async database session
+        model_class: SQLAlchemy model class with ``is_active`` and ``updated_at``
+        values: Column values to set
+        
+    Returns:
+        The inserted or updated object
+    """
+    dialect = db.bind.dialect.name
+    dialect_insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+    statement = dialect_insert(model_class).values(is_active=True, **values)
+    return await db.scalar(
+        statement.on_conflict_do_update(
+            index_elements=["is_active"],
+            index_where=text(ACTIVE_ROW_PREDICATES[dialect]),
+            set_={**values, "updated_at": func.now()}
+        ).returning(model_class)
+    )
+
+def build_like_pattern(search_term: str) -> str:
+    """
+    Build a substring LIKE pattern, escaping the term's wildcards
+    
+    Args:
+        search_term: Search term
+        
+    Returns:
+        Pattern to be used with ``escape="\\"``
+    """
+    escaped = search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+# pg_trgm indexes only help for terms that contain at least one trigram
+TRIGRAM_MIN_LENGTH = 3
+
+def substring_search_filter(search_term: str, *columns: Any) -> Any:
+    """
+    Generate a case-insensitive substring filter backed by the trigram indexes
+    
+    Args:
+        search_term: Search term
+        columns: Columns to match, any of which may contain the term
+        
+    Returns:
+        SQLAlchemy filter condition
+    """
+    pattern = build_like_pattern(search_term)
+    if len(search_term) < TRIGRAM_MIN_LENGTH:
+        # Matching on lower() keeps PostgreSQL off the trigram index, which
+        # would return nearly every row for candidates on such short terms
+        return or_(*[func.lower(column).like(pattern.lower(), escape="\\") for column in columns])
+    return or_(*[column.ilike(pattern, escape="\\") for column in columns])
+
+def fulltext_search_filter(search_term: str, model: Any) -> Any:
+    """
+    Generate a word search filter over all languages of a model
+    
+    Matching differs by database: PostgreSQL matches whole words of the
+    term (every word must appear, case-insensitively, without stemming),
+    so "stand" does not find "standard"; elsewhere, and on PostgreSQL
+    tables that have not been migrated to the search vector column yet,
+    the term is matched as a case-insensitive substring.
+    
+    Args:
+        search_term: Search term
+        model: SQLAlchemy model class with a search vector column
+        
+    Returns:
+        SQLAlchemy filter condition
+    """
+    table = model.__table__
+    if engine.dialect.name == "postgresql" and table.info.get("search_vector_ready"):
+        search_vector = literal_column(f"{table.name}.{SEARCH_VECTOR_COLUMN}")
+        return search_vector.op("@@")(func.plainto_tsquery(FTS_CONFIG, search_term))
+    return substring_search_filter(search_term, *table.info["search_columns"])
+
+@lru_cache(maxsize=64)
+def _searchable_columns(model_class: Any, field_names: tuple) -> tuple:
+    return tuple(getattr(model_class, field_name) for field_name in field_names if hasattr(model_class, field_name))
+
 def generate_search_filters(
     search_term: str, 
     searchable_fields: List[str], 
     model_class: Any
 ) -> List[Any]:
     """
-    Generate search filters for SQLAlchemy query
+    Generate case-insensitive search filters for SQLAlchemy query
     
     Args:
         search_term: Search term
@@ -283,15 +520,10 @@ def generate_search_filters(
     Returns:
         List of SQLAlchemy filter conditions
     """
-    from sqlalchemy import or_
-    
-    filters = []
-    for field_name in searchable_fields:
-        if hasattr(model_class, field_name):
-            field = getattr(model_class, field_name)
-            filters.append(field.contains(search_term))
-    
-    return [or_(*filters)] if filters else []
+    columns = _searchable_columns(model_class, tuple(searchable_fields))
+    return [substring_search_filter(search_term, *columns)] if columns else []
+
+FILE_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
 
 def format_file_size(size_bytes: int) -> str:
     """
@@ -306,13 +538,11 @@ def format_file_size(size_bytes: int) -> str:
     if size_bytes == 0:
         return "0 B"
     
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    import math
-    i = int(math.floor(math.log(size_bytes, 1024)))
-    p = math.pow(1024, i)
-    s = round(size_bytes / p, 2)
+    # Each unit is 2**10 of the previous one, so the bit length picks it
+    i = min((size_bytes.bit_length() - 1) // 10, len(FILE_SIZE_UNITS) - 1)
+    s = round(size_bytes / (1 << (i * 10)), 2)
     
-    return f"{s} {size_names[i]}"
+    return f"{s} {FILE_SIZE_UNITS[i]}"
 
 def clean_html_content(content: str) -> str:
     """
@@ -324,11 +554,8 @@ def clean_html_content(content: str) -> str:
     Returns:
         Cleaned content string
     """
-    import html
-    import re
-    
     # Remove HTML tags
-    clean_text = re.sub('<.*?>', '', content)
+    clean_text = HTML_TAG_PATTERN.sub('', content)
     
     # Decode HTML entities
     clean_text = html.unescape(clean_text)
@@ -13,8 +13,8 @@ from datetime import datetime
 # Add the app directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.db.database import Base, engine
-from app.db.models.user import User
+from app.db.database import engine, create_schema
+from app.db.models import User  # importing the package registers every table
 from app.core.security import get_password_hash
 from app.core.config import settings
 
@@ -22,7 +22,9 @@ def create_tables():
     """Create all database tables"""
     try:
         print("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            # Explicit setup step, so extra active singleton rows may be deactivated
+            create_schema(connection, deactivate_duplicates=True)
         print("✓ Database tables created successfully!")
         return True
     except Exception as e:
@@ -5,55 +5,162 @@ This script ensures proper environment setup and starts the FastAPI server
 """
 
 import os
+import sqlite3
 import sys
-import subprocess
-from pathlib import Path
+from contextlib import closing
 
-# Set SQLite database URL before importing anything
-os.environ["DATABASE_URL"] = "sqlite:///./tmsiti.db"
+HEADER = "TMSITI FastAPI Server\n" + "=" * 50 + "\n"
 
-# Remove any PostgreSQL environment variables that might interfere
-for key in ["PGDATABASE", "PGHOST", "PGPORT", "PGUSER", "PGPASSWORD"]:
-    if key in os.environ:
+STARTUP_BANNER = (
+    "Starting FastAPI server...\n"
+    "Access the API at: http://localhost:{port}\n"
+    "API Documentation: http://localhost:{port}/docs\n"
+    + "=" * 50 + "\n"
+)
+
+POSTGRES_ENV_KEYS = frozenset({"PGDATABASE", "PGHOST", "PGPORT", "PGUSER", "PGPASSWORD"})
+
+def configure_env():
+    """Default the app to the local SQLite database; must run before app modules are imported"""
+    if "DATABASE_URL" in os.environ:
+        # A configured database may rely on the libpq PG* variables, so keep them
+        return
+    os.environ["DATABASE_URL"] = "sqlite:///./tmsiti.db"
+    
+    # Remove any PostgreSQL environment variables that might interfere;
+    # only the ones actually set are touched, so unset keys cost no unsetenv
+    for key in POSTGRES_ENV_KEYS & os.environ.keys():
         del os.environ[key]
 
-def main():
-    """Main startup function"""
-    print("TMSITI FastAPI Server")
-    print("=" * 50)
+def sqlite_database_path(database_url: str):
+    """Path of the on-disk SQLite file named by the URL, or None for other databases and :memory:"""
+    from sqlalchemy.engine import make_url
+    
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    return url.database
+
+def database_has_schema(path: str) -> bool:
+    """Whether the SQLite file exists and contains at least one table"""
+    try:
+        with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as connection:
+            return connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' LIMIT 1").fetchone() is not None
+    except sqlite3.OperationalError:
+        return False
+
+def prepare_database() -> bool:
+    """Create or migrate the schema once, before any server worker starts
     
-    # Check if database exists, if not create it
-    if not Path("tmsiti.db").exists():
+    Returns:
+        False if the database could not be initialized
+    """
+    from app.core.config import settings
+    
+    database_path = sqlite_database_path(os.environ["DATABASE_URL"])
+    if database_path is not None and not database_has_schema(database_path):
         print("Database not found. Initializing...")
-        try:
-            subprocess.run([sys.executable, "create_tables.py"], check=True)
-            print("✓ Database initialized successfully!")
-        except subprocess.CalledProcessError as e:
-            print(f"✗ Database initialization failed: {e}")
-            return 1
+        # Run in this process; the app modules it imports are reused by uvicorn
+        from create_tables import main as create_tables_main
+        if not create_tables_main():
+            print("✗ Database initialization failed")
+            return False
+        print("✓ Database initialized successfully!")
     else:
-        print("✓ Database found")
+        from app.db.database import is_sqlite
+        
+        # An in-memory database only exists inside each worker's own engine
+        if not settings.db_auto_create or (is_sqlite and database_path is None):
+            print("✓ Database schema left to the app startup")
+            return True
+        
+        from app.db import models  # importing the package registers every table
+        from app.db.database import create_schema, engine
+        with engine.begin() as connection:
+            create_schema(connection)
+        print("✓ Database schema up to date")
+    
+    # The schema is in place, so workers skip their concurrent create_all;
+    # worker processes read the environment, an in-process server the settings
+    os.environ["DB_AUTO_CREATE"] = "false"
+    settings.db_auto_create = False
+    return True
+
+def worker_count(redis_url: str | None) -> int:
+    """WEB_CONCURRENCY if set, otherwise one worker per CPU when Redis is configured, else one"""
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return int(configured)
+    return (os.cpu_count() or 1) if redis_url else 1
+
+def main():
+    """Main startup function"""
+    configure_env()
+    
+    sys.stdout.write(HEADER)
+    
+    from app.core.config import settings
+    
+    # The reloader runs a file watcher next to the server, so it is opt-in
+    # with RELOAD=true
+    reload = os.getenv("RELOAD", "false").lower() == "true"
+    workers = None if reload else worker_count(settings.redis_url)
+    
+    # Response and principal caches, rate limit counters and the dashboard
+    # refresh lease are per process without Redis, so workers would disagree
+    if workers and workers > 1 and not settings.redis_url:
+        print("✗ More than one worker needs REDIS_URL; set WEB_CONCURRENCY=1 or configure Redis")
+        return 1
+    
+    if not prepare_database():
+        return 1
+    
+    port = int(os.getenv("PORT", "5000"))
+    # X-Forwarded-For is only trusted from these proxies; client IPs feed the rate limits
+    forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
     
     # Start the FastAPI server
-    print("Starting FastAPI server...")
-    print("Access the API at: http://localhost:5000")
-    print("API Documentation: http://localhost:5000/docs")
-    print("=" * 50)
+    sys.stdout.write(STARTUP_BANNER.format(port=port))
+    sys.stdout.flush()
+    
+    # Production: gunicorn imports the app once in the master (--preload) and
+    # forks the workers, which share its code pages copy-on-write
+    if os.getenv("TMSITI_PROD") == "1":
+        os.execvp(sys.executable, [
+            sys.executable, "-m", "gunicorn",
+            "-k", "uvicorn.workers.UvicornWorker",
+            "--preload",
+            "-w", str(workers or 1),
+            "-b", f"0.0.0.0:{port}",
+            "--forwarded-allow-ips", forwarded_allow_ips,
+            "app.main:app"
+        ])
+    
+    # Run uvicorn in this process instead of starting a second interpreter;
+    # uvloop and httptools (uvicorn[standard]) are picked up automatically
+    import uvicorn
     
     try:
-        subprocess.run([
-            sys.executable, "-m", "uvicorn", 
-            "app.main:app", 
-            "--host", "0.0.0.0", 
-            "--port", "5000", 
-            "--reload"
-        ], check=True)
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=port,
+            reload=reload,
+            workers=workers,
+            backlog=2048,
+            proxy_headers=True,
+            forwarded_allow_ips=forwarded_allow_ips,
+            # Beyond this many open connections a worker answers 503 instead of queueing
+            limit_concurrency=1000
+        )
     except KeyboardInterrupt:
         print("\nServer stopped by user")
         return 0
-    except subprocess.CalledProcessError as e:
-        print(f"Server failed to start: {e}")
-        return 1
+    except SystemExit as e:
+        if e.code:
+            print(f"Server failed to start: exit code {e.code}")
+            return 1
+    return 0
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file